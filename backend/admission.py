@@ -0,0 +1,241 @@
+"""
+Admission control: per-client and per-session token buckets, and a global
+cap on concurrent LLM-bound requests with a bounded, deadline-limited wait
+queue. Requests that can't be served soon are refused straight away with
+429 (caller over its rate) or 503 (server at capacity) and a Retry-After,
+instead of queueing until the LLM client gives up.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+from . import metrics
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") == "1"
+# Requests per second and burst size; a rate of 0 disables that bucket
+CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", "2"))
+CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", "30"))
+SESSION_RATE = float(os.getenv("ADMISSION_SESSION_RATE", "1"))
+SESSION_BURST = float(os.getenv("ADMISSION_SESSION_BURST", "10"))
+# Header identifying the client (e.g. set by a trusted proxy); the peer address otherwise
+CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "")
+# Overrides the default cap of API keys x GEMINI_MAX_CONCURRENT_PER_KEY
+MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "0"))
+QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+MAX_TRACKED = 100_000
+
+rejections = metrics.registry.counter(
+    "interview_admission_rejections_total", "Requests refused by admission control, by reason.", ("reason",))
+
+
+class Rejected(Exception):
+    """
+    Raised when a request is refused; maps to an HTTP error with Retry-After.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def retry_after_header(seconds: float) -> str:
+    # Whole seconds, at least 1; capped since "no key configured" waits forever
+    return str(max(1, math.ceil(min(seconds, 3600))))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Takes a token. Returns 0 on success, else seconds until one is available.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token buckets per id, LRU-bounded; a forgotten id starts with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_tracked: int = MAX_TRACKED, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_tracked = max_tracked
+        self.clock = clock
+        self._buckets = OrderedDict()
+
+    def take(self, key: str) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_tracked:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` holders; up to `queue_size` more wait in FIFO order for
+    at most `timeout` seconds each. A released slot is handed straight to
+    the next waiter.
+    """
+
+    def __init__(self, limit: int, queue_size: int = QUEUE_SIZE, timeout: float = QUEUE_TIMEOUT, clock=time.monotonic):
+        self.limit = max(1, limit)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.clock = clock
+        self.active = 0
+        self._waiters = deque()
+        # Moving average of how long a slot is held, for Retry-After
+        self.avg_hold = 1.0
+
+    def busy(self) -> bool:
+        return self.active >= self.limit or bool(self._waiters)
+
+    def retry_after(self) -> float:
+        return self.avg_hold * (len(self._waiters) + 1) / self.limit
+
+    def check_queue(self):
+        """
+        Raises Rejected(503) if a new request could not even wait for a slot.
+        """
+        if self.active >= self.limit and len(self._waiters) >= self.queue_size:
+            rejections.inc(reason="queue_full")
+            raise Rejected(503, "Server is at capacity, please retry", self.retry_after())
+
+    async def acquire(self):
+        if not self.busy():
+            self.active += 1
+            return
+        self.check_queue()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            with metrics.span("admission_wait"):
+                await asyncio.wait({waiter}, timeout=self.timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            rejections.inc(reason="queue_timeout")
+            raise Rejected(503, "Server is at capacity, please retry", self.retry_after())
+
+    def _abandon(self, waiter):
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as we gave up; pass it on
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, held: float = None):
+        if held is not None:
+            self.avg_hold += 0.1 * (held - self.avg_hold)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "active": self.active, "waiting": len(self._waiters),
+                "avg_hold_ms": round(self.avg_hold * 1000, 1)}
+
+
+class _Slot:
+    def __init__(self, limiter: ConcurrencyLimiter):
+        self.limiter = limiter
+
+    async def __aenter__(self):
+        await self.limiter.acquire()
+        self.started = self.limiter.clock()
+
+    async def __aexit__(self, *exc):
+        self.limiter.release(self.limiter.clock() - self.started)
+        return False
+
+
+class _NoSlot:
+    async def __aenter__(self):
+        pass
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class Admission:
+    """
+    Rate checks (check) and concurrency slots (slot) for the API handlers.
+    """
+
+    def __init__(self, max_concurrent: int, enabled: bool = ADMISSION_CONTROL,
+                 client_rate: float = CLIENT_RATE, client_burst: float = CLIENT_BURST,
+                 session_rate: float = SESSION_RATE, session_burst: float = SESSION_BURST,
+                 queue_size: int = QUEUE_SIZE, queue_timeout: float = QUEUE_TIMEOUT, clock=time.monotonic):
+        self.enabled = enabled
+        self.clients = RateLimiter(client_rate, client_burst, clock=clock)
+        self.sessions = RateLimiter(session_rate, session_burst, clock=clock)
+        self.limiter = ConcurrencyLimiter(MAX_CONCURRENT or max_concurrent, queue_size, queue_timeout, clock=clock)
+
+    def check(self, client_id: str, session_id: str = None):
+        """
+        Takes a token from the client's (and session's) bucket or raises Rejected(429).
+        """
+        if not self.enabled:
+            return
+        wait = self.clients.take(client_id)
+        if wait:
+            rejections.inc(reason="client_rate")
+            raise Rejected(429, "Too many requests from this client", wait)
+        if session_id is not None:
+            wait = self.sessions.take(session_id)
+            if wait:
+                rejections.inc(reason="session_rate")
+                raise Rejected(429, "Too many requests for this session", wait)
+
+    def check_capacity(self):
+        """
+        Refuses up front (503) when the wait queue is full, for handlers
+        that can't report a late refusal as an HTTP status.
+        """
+        if self.enabled:
+            self.limiter.check_queue()
+
+    def slot(self):
+        """
+        Async context manager holding one of the global LLM slots.
+        """
+        return _Slot(self.limiter) if self.enabled else _NoSlot()
+
+    def busy(self) -> bool:
+        return self.enabled and self.limiter.busy()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self.limiter.stats()}
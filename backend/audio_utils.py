@@ -1,39 +1,401 @@
-import whisper
-from gtts import gTTS
+import numpy as np
+import asyncio
+import io
+import logging
 import os
+import subprocess
+import threading
 import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
 
-# Load Whisper model (small is good balance of speed/accuracy)
-# We use a global variable but load it lazily
+from . import tts
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Largest recording /chat_audio accepts (about 2 minutes of 48 kHz stereo WAV)
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_MB", "25")) * 1024 * 1024
+
+# Dedicated pool for decode/ASR/TTS so they never run on the event loop
+# or compete with FastAPI's default threadpool
+audio_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AUDIO_WORKERS", "2")),
+    thread_name_prefix="audio",
+)
+
+# Whisper configuration
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai")  # "openai" or "faster-whisper"
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+# faster-whisper only: int8 is the fastest choice on CPU
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "en")
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "1") == "1"
+
+# Micro-batching of concurrent transcriptions (openai backend; 1 disables)
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "4"))
+WHISPER_BATCH_WAIT_MS = float(os.getenv("WHISPER_BATCH_WAIT_MS", "50"))
+
+# Server-side preprocessing before ASR
+VAD_BACKEND = os.getenv("VAD_BACKEND", "energy")  # "energy" or "webrtc" (needs `pip install webrtcvad`)
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "200"))
+VAD_MAX_GAP_MS = int(os.getenv("VAD_MAX_GAP_MS", "500"))
+VAD_FRAME_MS = 30
+
+# Whisper model singleton, loaded on startup (WHISPER_PRELOAD) or first use
 model = None
+_model_lock = threading.Lock()
 
-def load_whisper():
+def load_whisper(backend: str = None, model_size: str = None, compute_type: str = None):
+    """
+    Returns the process-wide Whisper model, loading it exactly once even
+    when called from several threads. Arguments override the environment
+    config (used by the benchmarks); the first load wins.
+    """
     global model
     if model is None:
-        print("Loading Whisper model...")
-        model = whisper.load_model("base")
-        print("Whisper model loaded.")
+        with _model_lock:
+            if model is None:
+                backend = backend or WHISPER_BACKEND
+                model_size = model_size or WHISPER_MODEL_SIZE
+                logger.info("Loading Whisper model (%s, %s)...", backend, model_size)
+                model = _load_model(backend, model_size, compute_type or WHISPER_COMPUTE_TYPE)
+                logger.info("Whisper model loaded.")
     return model
 
-def transcribe_audio(file_path: str) -> str:
+def _load_model(backend: str, model_size: str, compute_type: str):
+    if backend == "faster-whisper":
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("WHISPER_BACKEND=faster-whisper requires `pip install faster-whisper`")
+        loaded = WhisperModel(model_size, device=WHISPER_DEVICE, compute_type=compute_type)
+        loaded.backend = "faster-whisper"
+        return loaded
+    import whisper
+    loaded = whisper.load_model(model_size, device=WHISPER_DEVICE)
+    loaded.backend = "openai"
+    return loaded
+
+def decode_audio(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes audio from memory into mono float32 samples at sample_rate.
+    PCM WAV is decoded with NumPy; anything else ffmpeg reads (webm/opus,
+    mp3...) goes through an ffmpeg pipe. Nothing touches the disk.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            return decode_wav(data, sample_rate)
+        except (wave.Error, ValueError):
+            pass  # e.g. float or compressed WAV; let ffmpeg handle it
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def decode_wav(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes 8/16/32-bit PCM WAV bytes to mono float32 at sample_rate.
+    """
+    with wave.open(io.BytesIO(data)) as wav_file:
+        width = wav_file.getsampwidth()
+        channels = wav_file.getnchannels()
+        source_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, np.uint8).astype(np.float32) - 128) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, "<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(frames, "<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return resample(samples, source_rate, sample_rate)
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Resamples by linear interpolation, after a moving-average low-pass when
+    downsampling. Plenty for speech going into Whisper's 16 kHz front end.
+    """
+    if source_rate == target_rate or not len(samples):
+        return samples.astype(np.float32, copy=False)
+    if source_rate > target_rate:
+        width = int(round(source_rate / target_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode="same")
+    duration = len(samples) / source_rate
+    positions = np.arange(int(duration * target_rate)) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+def frame_rms(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """
+    Root-mean-square energy of consecutive whole frames.
+    """
+    usable = len(samples) - len(samples) % frame_size
+    if not usable:
+        return np.zeros(0, dtype=np.float32)
+    return np.sqrt(np.mean(samples[:usable].reshape(-1, frame_size) ** 2, axis=1))
+
+def speech_frames(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                  threshold_ratio: float = 3.0, min_rms: float = 0.01) -> np.ndarray:
+    """
+    Boolean speech mask with one entry per frame_ms frame.
+
+    The energy detector compares each frame with the recording's own noise
+    floor (10th percentile); the threshold is capped relative to the loud
+    frames so a clip that is speech throughout is not cut. VAD_BACKEND=webrtc
+    uses the WebRTC detector instead.
+    """
+    frame_size = sample_rate * frame_ms // 1000
+    if VAD_BACKEND == "webrtc":
+        try:
+            import webrtcvad
+        except ImportError:
+            raise RuntimeError("VAD_BACKEND=webrtc requires `pip install webrtcvad`")
+        vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+        step = frame_size * 2
+        return np.array([vad.is_speech(pcm[i:i + step], sample_rate)
+                         for i in range(0, len(pcm) - step + 1, step)], dtype=bool)
+
+    rms = frame_rms(samples, frame_size)
+    if not len(rms):
+        return np.zeros(0, dtype=bool)
+    floor, loud = np.percentile(rms, [10, 95])
+    threshold = max(min_rms, min(floor * threshold_ratio, loud * 0.25))
+    return rms > threshold
+
+def trim_silence(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, padding_ms: int = VAD_PADDING_MS,
+                 max_gap_ms: int = VAD_MAX_GAP_MS) -> np.ndarray:
+    """
+    Drops leading/trailing silence and shortens pauses longer than
+    max_gap_ms, keeping padding_ms around speech. Returns an empty array
+    if no speech is found.
+    """
+    mask = speech_frames(samples, sample_rate)
+    if not mask.any():
+        return np.zeros(0, dtype=np.float32)
+
+    frame_size = sample_rate * VAD_FRAME_MS // 1000
+    pad = padding_ms // VAD_FRAME_MS
+    max_gap = max(max_gap_ms // VAD_FRAME_MS, 2 * pad)
+
+    # Speech runs as [start, end) frame ranges, merged across short pauses
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], mask.astype(np.int8), [0]])))
+    runs = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        if runs and start - runs[-1][1] <= max_gap:
+            runs[-1][1] = end
+        else:
+            runs.append([start, end])
+
+    pieces = [samples[max(0, start - pad) * frame_size:min(len(mask), end + pad) * frame_size]
+              for start, end in runs]
+    return np.concatenate(pieces).astype(np.float32, copy=False)
+
+def normalize_audio(samples: np.ndarray, target_peak: float = 0.9, max_gain: float = 10.0) -> np.ndarray:
+    """
+    Removes DC offset and scales the peak to target_peak (gain is capped so
+    near-silent input is not blown up into noise).
+    """
+    if not len(samples):
+        return samples
+    samples = samples - samples.mean()
+    peak = float(np.abs(samples).max())
+    if peak == 0:
+        return samples.astype(np.float32, copy=False)
+    return (samples * min(max_gain, target_peak / peak)).astype(np.float32)
+
+def preprocess_audio(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Prepares decoded 16 kHz samples for ASR: silence trimmed, then normalised.
+    An empty result means the recording contains no speech.
+    """
+    return normalize_audio(trim_silence(samples, sample_rate))
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    """
+    Converts little-endian 16-bit PCM bytes to float32 samples in [-1, 1).
+    """
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+class EnergyEndpointer:
+    """
+    Detects the end of an utterance in a live stream of samples from frame
+    energy against an adaptive noise floor.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30, end_silence_ms: int = 700,
+                 min_speech_ms: int = 150, threshold_ratio: float = 3.0, min_rms: float = 0.01):
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.end_silence_frames = end_silence_ms // frame_ms
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self.reset()
+
+    def reset(self):
+        self._leftover = np.zeros(0, dtype=np.float32)
+        self.noise_floor = None
+        self.speech_frames = 0
+        self.silence_frames = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self.speech_frames >= self.min_speech_frames
+
+    def push(self, samples: np.ndarray) -> bool:
+        """
+        Feeds samples; returns True once speech has been followed by enough silence.
+        """
+        samples = np.concatenate([self._leftover, samples])
+        self._leftover = samples[len(samples) - len(samples) % self.frame_size:]
+
+        for value in frame_rms(samples, self.frame_size):
+            if self.noise_floor is None:
+                self.noise_floor = value
+            if value > max(self.min_rms, self.noise_floor * self.threshold_ratio):
+                self.speech_frames += 1
+                self.silence_frames = 0
+            else:
+                # Only adapt the floor on non-speech frames
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * value
+                self.silence_frames += 1
+        return self.in_speech and self.silence_frames >= self.end_silence_frames
+
+def _transcribe_one(_model, audio) -> str:
+    if _model.backend == "faster-whisper":
+        segments, _ = _model.transcribe(audio, language=WHISPER_LANGUAGE)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+    result = _model.transcribe(audio, language=WHISPER_LANGUAGE, fp16=WHISPER_DEVICE != "cpu")
+    return result["text"].strip()
+
+def transcribe_audio(audio) -> str:
     """
-    Transcribes audio file to text using Whisper.
+    Transcribes audio to text using Whisper. Accepts a file path or float32
+    16 kHz mono samples (as returned by decode_audio).
     """
     try:
         # Ensure model is loaded
         _model = load_whisper()
-        result = _model.transcribe(file_path)
-        return result["text"].strip()
+        return _transcribe_one(_model, audio)
     except Exception as e:
-        print(f"Error transcribing audio: {e}")
+        logger.error("Error transcribing audio: %s", e)
         return ""
 
+def transcribe_batch(clips: list) -> list:
+    """
+    Transcribes several clips at once. With the openai backend, clips of up
+    to 30 seconds are decoded together in one batched forward pass; longer
+    clips (and other backends) fall back to one at a time.
+    """
+    _model = load_whisper()
+    texts = [""] * len(clips)
+    batch = []
+    if _model.backend == "openai":
+        # Already loaded by load_whisper; imported here so faster-whisper setups never need them
+        import torch
+        import whisper
+        batch = [i for i, clip in enumerate(clips) if len(clip) <= whisper.audio.N_SAMPLES]
+
+    batched = set()
+    if len(batch) > 1:
+        try:
+            mels = [
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(clips[i]), n_mels=_model.dims.n_mels)
+                for i in batch
+            ]
+            options = whisper.DecodingOptions(language=WHISPER_LANGUAGE, fp16=WHISPER_DEVICE != "cpu", without_timestamps=True)
+            results = whisper.decode(_model, torch.stack(mels).to(_model.device), options)
+            for i, result in zip(batch, results):
+                texts[i] = result.text.strip()
+            batched = set(batch)
+        except Exception as e:
+            logger.warning("Error transcribing batch, falling back to one at a time: %s", e)
+
+    for i, clip in enumerate(clips):
+        if i not in batched:
+            texts[i] = transcribe_audio(clip)
+    return texts
+
+class TranscriptionBatcher:
+    """
+    Groups transcription requests that arrive within a short window into one
+    batched Whisper call on the audio executor.
+    """
+
+    def __init__(self, max_batch: int = WHISPER_BATCH_SIZE, max_wait_ms: float = WHISPER_BATCH_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+
+    async def transcribe(self, samples: np.ndarray) -> str:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((samples, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            clips = [samples for samples, _ in items]
+            try:
+                texts = await loop.run_in_executor(audio_executor, transcribe_batch, clips)
+            except Exception as e:
+                logger.error("Error transcribing batch: %s", e)
+                texts = [""] * len(items)
+            for (_, future), text in zip(items, texts):
+                if not future.done():
+                    future.set_result(text)
+
+_batcher = TranscriptionBatcher()
+
+async def transcribe_async(samples: np.ndarray) -> str:
+    """
+    Transcribes off the event loop, micro-batching concurrent requests.
+    """
+    if WHISPER_BATCH_SIZE <= 1:
+        return await asyncio.get_running_loop().run_in_executor(audio_executor, transcribe_audio, samples)
+    return await _batcher.transcribe(samples)
+
+def synthesize_speech(text: str) -> bytes:
+    """
+    Converts text to speech with the configured TTS backend and returns the
+    audio bytes (format given by tts.get_backend().media_type). Synthesised
+    and cached sentence by sentence, so fixed phrases are cache hits.
+    """
+    return tts.synthesize_reply(text)
+
 def text_to_speech(text: str, output_path: str):
     """
-    Converts text to speech using gTTS and saves to file.
+    Converts text to speech and saves to file.
     """
     try:
-        tts = gTTS(text=text, lang='en')
-        tts.save(output_path)
+        with open(output_path, "wb") as f:
+            f.write(synthesize_speech(text))
     except Exception as e:
-        print(f"Error generating speech: {e}")
+        logger.error("Error generating speech: %s", e)
@@ -0,0 +1,203 @@
+"""
+Offline batch evaluation of recorded interview transcripts.
+
+Streams transcripts from a JSONL file, one object per line:
+
+    {"id": "abc", "role": "Backend Engineer", "experience_level": "Senior",
+     "messages": [{"role": "model", "content": "..."}, {"role": "user", "content": "..."}]}
+
+and for each one scores every candidate answer with the persona classifier
+and generates feedback with FEEDBACK_PROMPT, concurrently and within the
+per-key rate limits of the shared key scheduler (when every key is out of
+budget the run waits for one rather than failing transcripts). Results are appended to the
+output JSONL as they complete; ids already in the output are skipped, so a
+crashed or interrupted run resumes where it stopped. Failures go to
+<output>.errors.jsonl and are retried on the next run.
+
+Usage:  python -m backend.batch_eval transcripts.jsonl results.jsonl [--concurrency 16] [--rpm 15]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+
+# Before importing our modules: they read their settings from the environment
+load_dotenv()
+
+from . import llm_client
+from . import log
+from .key_scheduler import backoff_delay
+from .llm_client import generate_response_async, LLMOverloaded, RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE
+from .persona_logic import score_transcript
+from .prompts import FEEDBACK_PROMPT
+from .transcript import SessionTranscript
+
+# Not __name__: run with -m this module is __main__, outside the "backend" logger
+logger = logging.getLogger("backend.batch_eval")
+
+class EvaluationError(Exception):
+    """Raised when a transcript could not be evaluated (retried on the next run)."""
+
+
+def completed_ids(output_path: str) -> set:
+    """
+    Ids already written to the output. A torn last line from a crash is ignored.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def read_transcripts(input_path: str, skip: set):
+    """
+    Yields transcript records lazily, skipping completed ids and lines that
+    aren't a JSON object with a string or number id.
+    """
+    with open(input_path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning("Skipping line %d: invalid JSON (%s)", number, e)
+                continue
+            if not isinstance(record, dict):
+                logger.warning("Skipping line %d: not a JSON object", number)
+                continue
+            record.setdefault("id", f"line-{number}")
+            if not isinstance(record["id"], (str, int)):
+                logger.warning("Skipping line %d: id must be a string or a number", number)
+                continue
+            if record["id"] not in skip:
+                yield record
+
+
+async def _generate_paced(prompt: str) -> str:
+    """
+    generate_response_async that waits out the keys' rate limits instead of
+    failing, so a large batch is paced by the per-key budgets.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await generate_response_async(prompt)
+        except LLMOverloaded as e:
+            if e.retry_after == float("inf"):
+                raise EvaluationError("No API key configured")
+            # Jittered so waiting tasks don't all retry at the same instant
+            await asyncio.sleep(e.retry_after + backoff_delay(attempt, base=0.1, cap=1.0))
+            attempt += 1
+
+
+async def evaluate_transcript(record: dict, with_feedback: bool = True) -> dict:
+    """
+    Persona scores and (optionally) feedback for one transcript record.
+    """
+    messages = record["messages"]
+    personas = score_transcript(messages)
+    result = {
+        "id": record["id"],
+        "personas": personas,
+        "persona_counts": dict(Counter(personas)),
+    }
+    if with_feedback:
+        transcript = SessionTranscript(record.get("role", ""), record.get("experience_level", ""), len(messages))
+        for msg in messages:
+            transcript.append(msg["role"], msg["content"])
+        started = time.perf_counter()
+        feedback = await _generate_paced(FEEDBACK_PROMPT.format(conversation_history=transcript.render()))
+        if feedback in (RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE):
+            raise EvaluationError(feedback)
+        result["feedback"] = feedback
+        result["feedback_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def run(input_path: str, output_path: str, concurrency: int, with_feedback: bool = True,
+              progress_every: int = 50) -> dict:
+    """
+    Evaluates every pending transcript, writing results as they complete.
+    Returns run statistics.
+    """
+    skip = completed_ids(output_path)
+    errors_path = output_path + ".errors.jsonl"
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"skipped": len(skip), "done": 0, "failed": 0}
+    started = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, open(errors_path, "a", encoding="utf-8") as errors:
+        async def evaluate(record):
+            try:
+                result = await evaluate_transcript(record, with_feedback)
+            except Exception as e:
+                errors.write(json.dumps({"id": record["id"], "error": str(e)}) + "\n")
+                errors.flush()
+                stats["failed"] += 1
+            else:
+                # One write per line from the event loop thread, so lines never interleave
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                stats["done"] += 1
+                if stats["done"] % progress_every == 0:
+                    elapsed = time.perf_counter() - started
+                    logger.info("%d done, %d failed, %.1f transcripts/min",
+                                stats["done"], stats["failed"], stats["done"] / elapsed * 60)
+            finally:
+                semaphore.release()
+
+        tasks = set()
+        for record in read_transcripts(input_path, skip):
+            # Bounded in-flight work; the input is never loaded whole
+            await semaphore.acquire()
+            task = asyncio.create_task(evaluate(record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 1)
+    stats["transcripts_per_minute"] = round(stats["done"] / elapsed * 60, 1) if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded transcripts through persona detection and feedback.")
+    parser.add_argument("input", help="transcripts JSONL")
+    parser.add_argument("output", help="results JSONL (appended to; completed ids are skipped)")
+    parser.add_argument("--concurrency", type=int,
+                        default=max(1, len(llm_client.API_KEYS)) * llm_client.MAX_CONCURRENT_PER_KEY)
+    parser.add_argument("--rpm", type=int, help="requests per minute per key (default GEMINI_RPM_PER_KEY)")
+    parser.add_argument("--personas-only", action="store_true", help="skip feedback generation (no API calls)")
+    args = parser.parse_args()
+    log.configure()
+
+    if args.rpm is not None:
+        llm_client.key_scheduler.rpm_limit = args.rpm
+
+    async def _main():
+        try:
+            return await run(args.input, args.output, args.concurrency, with_feedback=not args.personas_only)
+        finally:
+            await llm_client.aclose()
+
+    stats = asyncio.run(_main())
+    print(f"Finished: {stats['done']} evaluated, {stats['failed']} failed, {stats['skipped']} already done "
+          f"in {stats['seconds']}s ({stats['transcripts_per_minute']} transcripts/min)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Token-budgeted conversation context for the next-question prompt.
+
+The most recent messages are sent verbatim; older ones are folded into a
+running summary that is refreshed in the background between turns.
+"""
+import asyncio
+import logging
+import os
+
+from .llm_client import generate_response_async, RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE
+from .prompts import SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Messages kept verbatim at the end of the history
+RECENT_MESSAGES = int(os.getenv("CONTEXT_RECENT_MESSAGES", "8"))
+# Summarise once this many messages have fallen out of the verbatim window
+SUMMARY_BATCH = int(os.getenv("CONTEXT_SUMMARY_BATCH", "4"))
+# Hard cap on history tokens if the summary falls behind
+HISTORY_TOKEN_BUDGET = int(os.getenv("CONTEXT_HISTORY_TOKEN_BUDGET", "3000"))
+
+# Keep references so background tasks are not garbage collected mid-flight
+_summary_tasks = {}
+
+
+def build_history(transcript) -> str:
+    """
+    Returns the conversation history for the prompt: the running summary of
+    older turns followed by every not-yet-summarised message verbatim.
+    """
+    start = transcript.summarized_upto
+
+    # Summary is lagging far behind: keep the newest messages that fit the budget
+    while transcript.chars_from(start) // 4 > HISTORY_TOKEN_BUDGET and start < len(transcript) - 1:
+        start += 1
+    recent = transcript.render_range(start)
+
+    if not transcript.summary:
+        return recent
+    return f"Summary of earlier conversation:\n{transcript.summary}\n\nRecent conversation:\n{recent}"
+
+
+def schedule_summary(session_id: str, transcript, on_update=None, generate=generate_response_async):
+    """
+    Starts a background summary refresh if enough messages have aged out of
+    the verbatim window and no refresh is already running for this session.
+    on_update() is called, and awaited, after the transcript's summary has been replaced.
+    generate(prompt) makes the LLM call.
+    """
+    upto = len(transcript) - RECENT_MESSAGES
+    if upto - transcript.summarized_upto < SUMMARY_BATCH:
+        return
+    task = _summary_tasks.get(session_id)
+    if task is not None and not task.done():
+        return
+    _summary_tasks[session_id] = asyncio.create_task(_refresh_summary(session_id, transcript, upto, on_update, generate))
+
+
+async def _refresh_summary(session_id: str, transcript, upto: int, on_update=None, generate=generate_response_async):
+    try:
+        prompt = SUMMARY_PROMPT.format(
+            previous_summary=transcript.summary or "(none)",
+            new_turns=transcript.render_range(transcript.summarized_upto, upto),
+        )
+        summary = await generate(prompt)
+        if summary and summary not in (RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE):
+            transcript.summary = summary
+            transcript.summarized_upto = upto
+            if on_update is not None:
+                await on_update()
+    except Exception as e:
+        logger.error("Error summarising session: %s", e, extra={"session_id": session_id})
+    finally:
+        _summary_tasks.pop(session_id, None)
@@ -0,0 +1,98 @@
+"""
+Gemini context caching for the large static part of the system prompt.
+
+Cached contents belong to the Google Cloud project of the key that created
+them, so handles are tracked per (API key, cache key). When caching is not
+available (content below the minimum size, unsupported model, API errors)
+the caller simply sends the system instruction inline.
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCache:
+    """
+    Creates, reuses and expires cachedContents handles through the REST API.
+    """
+
+    def __init__(self, model_name: str, ttl: float = 3600.0, retry_unavailable_after: float = 600.0,
+                 clock=time.monotonic):
+        self.model_name = model_name
+        self.ttl = ttl
+        self.retry_unavailable_after = retry_unavailable_after
+        self.clock = clock
+        self._handles = {}
+        self._unavailable = {}
+        self._locks = {}
+
+    async def handle_for(self, client, api_key: str, cache_key: str, system_instruction: str):
+        """
+        Returns a cachedContents name for this key and content, creating it on
+        first use, or None if the caller should fall back to inline content.
+        """
+        entry_key = (api_key, cache_key)
+        now = self.clock()
+        handle = self._handles.get(entry_key)
+        # Leave a margin so a handle never expires mid-request
+        if handle is not None and handle["expires_at"] - 60 > now:
+            return handle["name"]
+        if self._unavailable.get(entry_key, 0) > now:
+            return None
+
+        lock = self._locks.setdefault(entry_key, asyncio.Lock())
+        async with lock:
+            handle = self._handles.get(entry_key)
+            if handle is not None and handle["expires_at"] - 60 > self.clock():
+                return handle["name"]
+            try:
+                response = await client.post(
+                    "/v1beta/cachedContents",
+                    json={
+                        "model": f"models/{self.model_name}",
+                        "systemInstruction": {"parts": [{"text": system_instruction}]},
+                        "ttl": f"{int(self.ttl)}s",
+                    },
+                    headers={"x-goog-api-key": api_key},
+                )
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{response.status_code} {response.text}")
+                name = response.json()["name"]
+            except Exception as e:
+                logger.warning("Context caching unavailable, sending prompt inline: %s", e)
+                self._unavailable[entry_key] = self.clock() + self.retry_unavailable_after
+                return None
+
+            self._handles[entry_key] = {"name": name, "expires_at": self.clock() + self.ttl}
+            return name
+
+    def reject(self, api_key: str, cache_key: str):
+        """
+        Drops a handle generateContent refused (e.g. expired server-side) and
+        sends this content inline for a while before trying to cache it again.
+        """
+        self._handles.pop((api_key, cache_key), None)
+        self._unavailable[(api_key, cache_key)] = self.clock() + self.retry_unavailable_after
+
+    async def expire(self, client, cache_key: str):
+        """
+        Deletes every handle for cache_key (one per API key that used it).
+        """
+        for entry_key in [k for k in self._handles if k[1] == cache_key]:
+            handle = self._handles.pop(entry_key)
+            self._locks.pop(entry_key, None)
+            try:
+                await client.delete(f"/v1beta/{handle['name']}", headers={"x-goog-api-key": entry_key[0]})
+            except Exception as e:
+                logger.warning("Error deleting cached content %s: %s", handle["name"], e)
+        for entry_key in [k for k in self._unavailable if k[1] == cache_key]:
+            self._unavailable.pop(entry_key, None)
+
+    def stats(self) -> dict:
+        now = self.clock()
+        return {
+            "handles": len(self._handles),
+            "unavailable": sum(1 for until in self._unavailable.values() if until > now),
+        }
@@ -0,0 +1,107 @@
+"""
+Background feedback generation, memoised per session and transcript version.
+
+Feedback starts as soon as the interview ends, so by the time the candidate
+opens the feedback screen it is usually ready. The result is stored with
+the session keyed by the transcript length it was generated from; asking
+again for an unchanged transcript costs nothing.
+"""
+import asyncio
+import time
+
+from .metrics import span
+from .prompts import FEEDBACK_PROMPT
+
+
+class FeedbackJobs:
+    """
+    One feedback task per session; a newer transcript version replaces an
+    older in-flight job.
+    """
+
+    def __init__(self, generate, session_store, reject=(), clock=time.monotonic):
+        self.generate = generate
+        self.session_store = session_store
+        # Replies that are errors, never memoised (e.g. rate-limit apologies)
+        self.reject = set(reject)
+        self.clock = clock
+        self._jobs = {}
+
+    @staticmethod
+    def _cached(session: dict, version: int):
+        feedback = session.get("feedback")
+        if feedback and feedback["version"] == version:
+            return feedback["text"]
+        return None
+
+    def start(self, session_id: str, session: dict) -> asyncio.Task:
+        """
+        Starts (or returns the running) job for the current transcript.
+        Returns None if feedback for this version is already stored.
+        """
+        version = len(session["transcript"])
+        if self._cached(session, version) is not None:
+            return None
+        job = self._jobs.get(session_id)
+        if job is not None and job["version"] == version and not job["task"].done():
+            return job["task"]
+        if job is not None:
+            job["task"].cancel()
+
+        task = asyncio.create_task(self._run(session_id, session, version))
+        # Nobody may be waiting on it; a failure is reported through status()
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._jobs[session_id] = {"version": version, "task": task, "started_at": self.clock(), "failed": False}
+        return task
+
+    async def _run(self, session_id: str, session: dict, version: int) -> str:
+        prompt = FEEDBACK_PROMPT.format(conversation_history=session["transcript"].render_range(0, version))
+        try:
+            with span("feedback_generate"):
+                text = await self.generate(prompt)
+        except Exception:
+            self._mark_failed(session_id, version)
+            raise
+        job = self._jobs.get(session_id)
+        if text in self.reject:
+            self._mark_failed(session_id, version)
+            return text
+        session["feedback"] = {"version": version, "text": text}
+        await self.session_store.update_async(session_id, session, ["feedback"])
+        # Stored with the session now; the job entry is no longer needed
+        if job is not None and job["version"] == version:
+            del self._jobs[session_id]
+        return text
+
+    def _mark_failed(self, session_id: str, version: int):
+        job = self._jobs.get(session_id)
+        if job is not None and job["version"] == version:
+            job["failed"] = True
+
+    async def result(self, session_id: str, session: dict) -> str:
+        """
+        Feedback for the current transcript: stored, in progress, or started now.
+        """
+        cached = self._cached(session, len(session["transcript"]))
+        if cached is not None:
+            return cached
+        # A finished job that failed is simply started again; shield keeps a
+        # disconnecting caller from cancelling a job others may be awaiting
+        return await asyncio.shield(self.start(session_id, session))
+
+    def status(self, session_id: str, session: dict) -> dict:
+        version = len(session["transcript"])
+        if self._cached(session, version) is not None:
+            return {"status": "ready", "version": version}
+        job = self._jobs.get(session_id)
+        if job is None or job["version"] != version:
+            return {"status": "not_started", "version": version}
+        if job["failed"]:
+            return {"status": "failed", "version": version}
+        return {"status": "running", "version": version,
+                "elapsed_ms": round((self.clock() - job["started_at"]) * 1000, 1)}
+
+    def discard(self, session_id: str):
+        job = self._jobs.pop(session_id, None)
+        if job is not None and not job["task"].done():
+            job["task"].cancel()
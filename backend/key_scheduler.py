@@ -0,0 +1,189 @@
+"""
+Multi-key scheduling for the Gemini API.
+
+Tracks per-key request/token budgets, cooldowns after rate limits and recent
+error rates, and hands out the least-loaded healthy key for each call.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+WINDOW_SECONDS = 60.0
+
+
+class KeyState:
+    """
+    Budget and health bookkeeping for a single API key.
+    """
+
+    def __init__(self, index: int, api_key: str):
+        self.index = index
+        self.api_key = api_key
+        self.name = f"key_{index + 1}"
+        self.in_flight = 0
+        self.request_times = deque()
+        self.token_events = deque()
+        self.cooldown_until = 0.0
+        self.consecutive_rate_limits = 0
+        self.recent_errors = deque(maxlen=20)
+
+        # Lifetime counters
+        self.requests = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.tokens = 0
+
+    def prune(self, now: float):
+        cutoff = now - WINDOW_SECONDS
+        while self.request_times and self.request_times[0] <= cutoff:
+            self.request_times.popleft()
+        while self.token_events and self.token_events[0][0] <= cutoff:
+            self.token_events.popleft()
+
+    def tokens_in_window(self) -> int:
+        return sum(tokens for _, tokens in self.token_events)
+
+    def error_rate(self) -> float:
+        if not self.recent_errors:
+            return 0.0
+        return sum(self.recent_errors) / len(self.recent_errors)
+
+
+class KeyScheduler:
+    """
+    Thread-safe scheduler handing out API keys within their RPM/TPM budgets.
+
+    Call acquire() before a request and release() with the outcome after it.
+    """
+
+    def __init__(self, api_keys: list, rpm_limit: int = 15, tpm_limit: int = 1_000_000,
+                 cooldown: float = 30.0, max_cooldown: float = 600.0, clock=time.monotonic):
+        self.keys = [KeyState(i, key) for i, key in enumerate(api_keys)]
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def _has_budget(self, key: KeyState, now: float, estimated_tokens: int) -> bool:
+        if key.cooldown_until > now:
+            return False
+        # request_times already includes requests still in flight
+        if self.rpm_limit and len(key.request_times) >= self.rpm_limit:
+            return False
+        if self.tpm_limit and key.tokens_in_window() + estimated_tokens > self.tpm_limit:
+            return False
+        return True
+
+    def _load(self, key: KeyState) -> float:
+        # Fraction of the request budget in use, penalised by recent failures
+        return len(key.request_times) / (self.rpm_limit or 1_000_000) + key.error_rate()
+
+    def acquire(self, estimated_tokens: int = 0):
+        """
+        Reserves the least-loaded key with budget left, or returns None if every
+        key is cooling down or out of budget.
+        """
+        with self._lock:
+            now = self.clock()
+            candidates = []
+            for key in self.keys:
+                key.prune(now)
+                if self._has_budget(key, now, estimated_tokens):
+                    candidates.append(key)
+            if not candidates:
+                return None
+
+            key = min(candidates, key=self._load)
+            key.in_flight += 1
+            key.requests += 1
+            key.request_times.append(now)
+            return key
+
+    def release(self, key: KeyState, tokens: int = 0, rate_limited: bool = False,
+                error: bool = False, retry_after: float = None):
+        """
+        Records the outcome of a request made with an acquired key.
+        """
+        with self._lock:
+            now = self.clock()
+            key.in_flight = max(0, key.in_flight - 1)
+            if tokens:
+                key.tokens += tokens
+                key.token_events.append((now, tokens))
+
+            if rate_limited:
+                key.rate_limited += 1
+                key.consecutive_rate_limits += 1
+                delay = retry_after or min(self.max_cooldown, self.cooldown * 2 ** (key.consecutive_rate_limits - 1))
+                key.cooldown_until = max(key.cooldown_until, now + delay)
+                key.recent_errors.append(1)
+            elif error:
+                key.errors += 1
+                key.recent_errors.append(1)
+            else:
+                key.successes += 1
+                key.consecutive_rate_limits = 0
+                key.recent_errors.append(0)
+
+    def has_spare_budget(self, max_load: float) -> bool:
+        """
+        Whether some key is usable with less than max_load of its request
+        budget spent, so optional work doesn't crowd out real requests.
+        """
+        with self._lock:
+            now = self.clock()
+            for key in self.keys:
+                key.prune(now)
+                if key.cooldown_until <= now and (not self.rpm_limit or len(key.request_times) < max_load * self.rpm_limit):
+                    return True
+            return False
+
+    def next_available_in(self) -> float:
+        """
+        Seconds until at least one key should have budget again.
+        """
+        with self._lock:
+            now = self.clock()
+            waits = []
+            for key in self.keys:
+                key.prune(now)
+                wait = max(0.0, key.cooldown_until - now)
+                if self.rpm_limit and len(key.request_times) >= self.rpm_limit:
+                    wait = max(wait, key.request_times[0] + WINDOW_SECONDS - now)
+                waits.append(wait)
+            return min(waits) if waits else float("inf")
+
+    def stats(self) -> list:
+        """
+        Per-key counters, safe to expose (the key itself is never included).
+        """
+        with self._lock:
+            now = self.clock()
+            result = []
+            for key in self.keys:
+                key.prune(now)
+                result.append({
+                    "key": key.name,
+                    "in_flight": key.in_flight,
+                    "requests": key.requests,
+                    "successes": key.successes,
+                    "rate_limited": key.rate_limited,
+                    "errors": key.errors,
+                    "tokens": key.tokens,
+                    "requests_last_minute": len(key.request_times),
+                    "tokens_last_minute": key.tokens_in_window(),
+                    "error_rate": round(key.error_rate(), 3),
+                    "cooldown_remaining": round(max(0.0, key.cooldown_until - now), 1),
+                })
+            return result
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """
+    Exponential backoff with full jitter.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
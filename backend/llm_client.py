@@ -1,8 +1,27 @@
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import json
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from contextlib import aclosing
+import httpx
 
-load_dotenv()
+from .key_scheduler import KeyScheduler, backoff_delay
+from .context_cache import ContextCache
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# "gemini" (default) or "fake": an in-process stand-in for load tests
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+FAKE_LLM_JITTER = float(os.getenv("FAKE_LLM_JITTER", "0.3"))
+FAKE_LLM_DISTRIBUTION = os.getenv("FAKE_LLM_DISTRIBUTION", "lognormal")
+# Fraction of fake calls answered with an injected 429
+FAKE_LLM_429_RATE = float(os.getenv("FAKE_LLM_429_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
 
 # Support multiple API keys - add as many as you want!
 API_KEYS = [
@@ -14,47 +33,531 @@ API_KEYS = [
 # Filter out None values (keys that don't exist)
 API_KEYS = [key for key in API_KEYS if key]
 
+# The fake provider needs no real key, just something to schedule
+if LLM_PROVIDER == "fake" and not API_KEYS:
+    API_KEYS = ["fake-key"]
+
 if not API_KEYS:
-    print("Warning: No GEMINI_API_KEY found in environment variables.")
+    logger.warning("No GEMINI_API_KEY found in environment variables.")
 
-current_key_index = 0
 MODEL_NAME = "gemini-2.0-flash"
 
+# REST endpoint for the async path (override to point at a local fake server)
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+
+# Max in-flight Gemini calls per API key on the async path
+MAX_CONCURRENT_PER_KEY = int(os.getenv("GEMINI_MAX_CONCURRENT_PER_KEY", "8"))
+REQUEST_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+
+# Route the SDK through the same endpoint when it has been overridden
+SDK_OPTIONS = {}
+if os.getenv("GEMINI_API_BASE"):
+    SDK_OPTIONS = {"transport": "rest", "client_options": {"api_endpoint": GEMINI_API_BASE}}
+
+# Per-key budgets (defaults match the free tier) and retry behaviour
+RPM_PER_KEY = int(os.getenv("GEMINI_RPM_PER_KEY", "15"))
+TPM_PER_KEY = int(os.getenv("GEMINI_TPM_PER_KEY", "1000000"))
+KEY_COOLDOWN = float(os.getenv("GEMINI_KEY_COOLDOWN", "30"))
+MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", str(len(API_KEYS) + 2)))
+# Longest we will wait for a key to free up before giving up on a request
+MAX_KEY_WAIT = float(os.getenv("GEMINI_MAX_KEY_WAIT", "10"))
+
+# Cache the static system prompt server-side (falls back to inline if unavailable)
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "1") == "1"
+CONTEXT_CACHE_TTL = float(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+# The API refuses to cache less than the model's minimum; smaller instructions
+# are sent inline without first paying for a create that is bound to fail
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+
+RATE_LIMIT_MESSAGE = "I apologize, but all API keys have reached their daily limits. Please try again tomorrow or add more API keys."
+CONNECTION_ERROR_MESSAGE = "I apologize, but I'm having trouble connecting right now. Please try again."
+
+key_scheduler = KeyScheduler(API_KEYS, rpm_limit=RPM_PER_KEY, tpm_limit=TPM_PER_KEY, cooldown=KEY_COOLDOWN)
+context_cache = ContextCache(MODEL_NAME, ttl=CONTEXT_CACHE_TTL)
+
+_key_semaphores = {}
+
+
+class RateLimitError(Exception):
+    """
+    Raised for a 429 / RESOURCE_EXHAUSTED response.
+    """
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMOverloaded(Exception):
+    """
+    Raised by the async path when no key can take the request soon enough
+    (all rate limited or out of budget). retry_after is when one frees up.
+    """
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CachedContentRejected(Exception):
+    """
+    Raised when generateContent refuses a cachedContents handle.
+    """
+
+
+def _is_rate_limit_error(error_msg: str) -> bool:
+    error_msg = error_msg.lower()
+    return "quota" in error_msg or "rate limit" in error_msg or "429" in error_msg or "resource_exhausted" in error_msg
+
+
+def estimate_tokens(*texts: str) -> int:
+    """
+    Rough token estimate (~4 characters per token) used for budgeting.
+    """
+    return sum(len(text) for text in texts if text) // 4
+
+
+def _next_key_delay(attempt: int):
+    """
+    How long to wait before retrying when no key has budget, or None to give up.
+    """
+    wait = key_scheduler.next_available_in()
+    if wait > MAX_KEY_WAIT:
+        return None
+    return wait + backoff_delay(attempt, base=0.1, cap=1.0)
+
+
 def generate_response(prompt: str, system_instruction: str = None) -> str:
     """
-    Generates a response from Gemini with automatic key rotation on rate limit.
+    Generates a response from Gemini, spreading load across keys and backing
+    off (with jitter) on rate limits.
+
+    Always goes through the Gemini SDK; LLM_PROVIDER only applies to the
+    async path. The app itself uses generate_response_async; this path is
+    kept as the baseline for benchmarks/llm_load.py. genai.configure() is
+    process-global, so calls on different keys must not overlap.
     """
-    global current_key_index
-    
-    for attempt in range(len(API_KEYS)):
+    estimated = estimate_tokens(prompt, system_instruction)
+
+    for attempt in range(MAX_ATTEMPTS):
+        key = key_scheduler.acquire(estimated)
+        if key is None:
+            delay = _next_key_delay(attempt)
+            if delay is None:
+                break
+            with metrics.span("llm_key_wait"):
+                time.sleep(delay)
+            continue
+
         try:
-            # Configure with current key
-            genai.configure(api_key=API_KEYS[current_key_index])
-            
+            # The SDK is slow to import and only this path needs it
+            import google.generativeai as genai
+
+            genai.configure(api_key=key.api_key, **SDK_OPTIONS)
             model = genai.GenerativeModel(MODEL_NAME, system_instruction=system_instruction)
             response = model.generate_content(prompt)
-            return response.text.strip()
-            
+            text = response.text.strip()
+            usage = getattr(response, "usage_metadata", None)
+            key_scheduler.release(key, tokens=getattr(usage, "total_token_count", 0) or estimated)
+            metrics.llm_requests.inc(key=key.name, outcome="ok")
+            if usage is not None:
+                metrics.record_usage({
+                    "promptTokenCount": getattr(usage, "prompt_token_count", 0),
+                    "candidatesTokenCount": getattr(usage, "candidates_token_count", 0),
+                    "cachedContentTokenCount": getattr(usage, "cached_content_token_count", 0),
+                })
+            return text
+
         except Exception as e:
             error_msg = str(e)
-            
+
             # Check if it's a rate limit error
-            if "quota" in error_msg.lower() or "rate limit" in error_msg.lower() or "429" in error_msg:
-                print(f"Rate limit hit on key {current_key_index + 1}. Switching to next key...")
-                
-                # Switch to next key
-                current_key_index = (current_key_index + 1) % len(API_KEYS)
-                
-                # If we've tried all keys, give up
-                if attempt == len(API_KEYS) - 1:
-                    print("All API keys have hit rate limits!")
-                    return "I apologize, but all API keys have reached their daily limits. Please try again tomorrow or add more API keys."
-                
-                # Try next key
+            if _is_rate_limit_error(error_msg):
+                logger.warning("Rate limit hit, backing off", extra={"key": key.name, "attempt": attempt})
+                metrics.llm_requests.inc(key=key.name, outcome="rate_limited")
+                key_scheduler.release(key, rate_limited=True)
+                time.sleep(backoff_delay(attempt))
                 continue
             else:
                 # Other error, not rate limit
-                print(f"Error calling Gemini: {e}")
-                return "I apologize, but I'm having trouble connecting right now. Please try again."
-    
-    return "Unable to generate response after trying all available keys."
+                key_scheduler.release(key, error=True)
+                metrics.llm_requests.inc(key=key.name, outcome="error")
+                logger.error("Error calling Gemini: %s", e, extra={"key": key.name})
+                return CONNECTION_ERROR_MESSAGE
+
+    logger.error("All API keys have hit rate limits")
+    return RATE_LIMIT_MESSAGE
+
+
+def _get_key_semaphore(api_key: str) -> asyncio.Semaphore:
+    semaphore = _key_semaphores.get(api_key)
+    if semaphore is None:
+        semaphore = _key_semaphores[api_key] = asyncio.Semaphore(MAX_CONCURRENT_PER_KEY)
+    return semaphore
+
+
+def _build_request_body(prompt: str, system_instruction: str = None, cached_content: str = None) -> dict:
+    body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if cached_content:
+        body["cachedContent"] = cached_content
+    elif system_instruction:
+        body["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+    return body
+
+
+def _extract_text(data: dict) -> str:
+    candidates = data.get("candidates") or []
+    if not candidates:
+        raise ValueError(f"Gemini returned no candidates: {data.get('promptFeedback')}")
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts).strip()
+
+
+def _raise_for_status(status_code: int, body_text: str, cached_content: str = None):
+    if status_code < 400:
+        return
+    if status_code == 429 or _is_rate_limit_error(body_text):
+        raise RateLimitError(f"{status_code} {body_text}", retry_after=_parse_retry_delay(body_text))
+    if cached_content and status_code < 500:
+        raise CachedContentRejected(f"{status_code} {body_text}")
+    raise RuntimeError(f"{status_code} {body_text}")
+
+
+def _parse_retry_delay(body_text: str):
+    # Gemini reports the suggested wait as a RetryInfo detail, e.g. "retryDelay": "13s"
+    try:
+        details = json.loads(body_text).get("error", {}).get("details", [])
+    except (ValueError, AttributeError):
+        return None
+    for detail in details:
+        delay = detail.get("retryDelay")
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                return None
+    return None
+
+
+class GeminiProvider:
+    """
+    The Gemini REST API. Talks HTTP directly (no SDK, no threadpool) over
+    one shared client, and supports server-side context caching.
+
+    A provider makes exactly one attempt per call and reports failures as
+    RateLimitError / CachedContentRejected / other exceptions; key choice,
+    retries and accounting stay in generate_response_async.
+    """
+
+    name = "gemini"
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=GEMINI_API_BASE, timeout=REQUEST_TIMEOUT)
+        return self._client
+
+    async def cached_content(self, key, cache_key: str, system_instruction: str):
+        return await context_cache.handle_for(self.client, key.api_key, cache_key, system_instruction)
+
+    async def generate(self, key, body: dict) -> dict:
+        response = await self.client.post(
+            f"/v1beta/models/{MODEL_NAME}:generateContent",
+            json=body,
+            headers={"x-goog-api-key": key.api_key},
+        )
+        _raise_for_status(response.status_code, response.text, body.get("cachedContent"))
+        return response.json()
+
+    async def stream(self, key, body: dict):
+        """
+        Yields the parsed streamGenerateContent chunks.
+        """
+        async with self.client.stream(
+            "POST",
+            f"/v1beta/models/{MODEL_NAME}:streamGenerateContent",
+            params={"alt": "sse"},
+            json=body,
+            headers={"x-goog-api-key": key.api_key},
+        ) as response:
+            if response.status_code >= 400:
+                _raise_for_status(response.status_code, (await response.aread()).decode(), body.get("cachedContent"))
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    yield json.loads(line[len("data:"):])
+
+    async def expire(self, cache_key: str):
+        await context_cache.expire(self.client, cache_key)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+FAKE_REPLIES = (
+    "Thanks for sharing that. Can you walk me through a project you are proud of?",
+    "That makes sense. How did you decide between the options you had?",
+    "Interesting. What would you do differently if you started that project again today?",
+    "Good. Tell me about a time you disagreed with a teammate and how it was resolved.",
+    "Let's go deeper on that. How did you measure whether the change actually worked?",
+)
+
+
+class FakeProvider:
+    """
+    In-process stand-in for Gemini for load tests and offline capacity
+    planning: no network, latency drawn from a configurable distribution,
+    streaming, and injected 429s. Replies depend only on the prompt and the
+    random source is seeded, so runs are repeatable.
+
+    Distributions: "fixed", "uniform" (latency +/- jitter), "normal" (jitter
+    is the standard deviation) and "lognormal" (median latency, jitter is
+    the sigma of the log; a long right tail like the real API).
+    """
+
+    name = "fake"
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, latency: float = None, jitter: float = None, distribution: str = None,
+                 rate_limit_rate: float = None, seed: int = None):
+        self.latency = FAKE_LLM_LATENCY if latency is None else latency
+        self.jitter = FAKE_LLM_JITTER if jitter is None else jitter
+        self.distribution = distribution or FAKE_LLM_DISTRIBUTION
+        if self.distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+        self.rate_limit_rate = FAKE_LLM_429_RATE if rate_limit_rate is None else rate_limit_rate
+        self.random = random.Random(FAKE_LLM_SEED if seed is None else seed)
+        self.calls = 0
+        self.rate_limited = 0
+
+    def sample_latency(self) -> float:
+        if self.distribution == "fixed":
+            return self.latency
+        if self.distribution == "uniform":
+            return max(0.0, self.random.uniform(self.latency - self.jitter, self.latency + self.jitter))
+        if self.distribution == "normal":
+            return max(0.0, self.random.gauss(self.latency, self.jitter))
+        return self.latency * self.random.lognormvariate(0.0, self.jitter)
+
+    def _begin(self, body: dict):
+        self.calls += 1
+        if self.rate_limit_rate and self.random.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise RateLimitError("429 RESOURCE_EXHAUSTED (injected by FakeProvider)")
+        prompt = body["contents"][0]["parts"][0]["text"]
+        instruction = "".join(part["text"] for part in body.get("systemInstruction", {}).get("parts", []))
+        reply = FAKE_REPLIES[int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16) % len(FAKE_REPLIES)]
+        prompt_tokens = estimate_tokens(prompt, instruction)
+        completion_tokens = estimate_tokens(reply)
+        usage = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": completion_tokens,
+            "totalTokenCount": prompt_tokens + completion_tokens,
+        }
+        return reply, usage
+
+    async def cached_content(self, key, cache_key: str, system_instruction: str):
+        # No server-side cache; the system instruction is always sent inline
+        return None
+
+    async def generate(self, key, body: dict) -> dict:
+        reply, usage = self._begin(body)
+        await asyncio.sleep(self.sample_latency())
+        return {"candidates": [{"content": {"role": "model", "parts": [{"text": reply}]}}], "usageMetadata": usage}
+
+    async def stream(self, key, body: dict):
+        reply, usage = self._begin(body)
+        total = self.sample_latency()
+        words = reply.split(" ")
+        # First token after a fifth of the latency, the rest spread over the remainder
+        await asyncio.sleep(total * 0.2)
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": word if last else word + " "}]}}]}
+            if last:
+                chunk["usageMetadata"] = usage
+            yield chunk
+            if not last:
+                await asyncio.sleep(total * 0.8 / len(words))
+
+    async def expire(self, cache_key: str):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+def create_provider(name: str = None):
+    name = name or LLM_PROVIDER
+    if name == "gemini":
+        return GeminiProvider()
+    if name == "fake":
+        return FakeProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
+
+
+# Swappable at runtime (e.g. llm_client.provider = FakeProvider(...) in a benchmark)
+provider = create_provider()
+
+
+def context_cacheable(system_instruction: str) -> bool:
+    """
+    Whether system_instruction would be served from the context cache:
+    caching is on and it is at least CONTEXT_CACHE_MIN_TOKENS long.
+    """
+    return bool(CONTEXT_CACHE_ENABLED and system_instruction) and estimate_tokens(system_instruction) >= CONTEXT_CACHE_MIN_TOKENS
+
+
+async def _cached_content_for(key, system_instruction: str, cache_key: str):
+    if not (cache_key and context_cacheable(system_instruction)):
+        return None
+    return await provider.cached_content(key, cache_key, system_instruction)
+
+
+async def generate_response_async(prompt: str, system_instruction: str = None, cache_key: str = None) -> str:
+    """
+    Async variant of generate_response, through the configured provider.
+    Never holds a threadpool worker while waiting, and caps in-flight calls
+    per key.
+
+    Pass cache_key when system_instruction is static across calls so it can be
+    served from Gemini's context cache instead of being resent.
+
+    Raises LLMOverloaded when every key stays rate limited or out of budget.
+    """
+    estimated = estimate_tokens(prompt, system_instruction)
+
+    for attempt in range(MAX_ATTEMPTS):
+        key = key_scheduler.acquire(estimated)
+        if key is None:
+            delay = _next_key_delay(attempt)
+            if delay is None:
+                break
+            with metrics.span("llm_key_wait"):
+                await asyncio.sleep(delay)
+            continue
+
+        try:
+            cached_content = await _cached_content_for(key, system_instruction, cache_key)
+            body = _build_request_body(prompt, system_instruction, cached_content)
+            async with _get_key_semaphore(key.api_key):
+                with metrics.span("llm_request"):
+                    data = await provider.generate(key, body)
+            text = _extract_text(data)
+            usage = data.get("usageMetadata", {})
+            key_scheduler.release(key, tokens=usage.get("totalTokenCount", estimated))
+            metrics.llm_requests.inc(key=key.name, outcome="ok")
+            metrics.record_usage(usage)
+            return text
+
+        except asyncio.CancelledError:
+            key_scheduler.release(key)
+            raise
+        except CachedContentRejected as e:
+            logger.warning("Cached content rejected, retrying inline: %s", e, extra={"key": key.name})
+            metrics.llm_requests.inc(key=key.name, outcome="cache_rejected")
+            key_scheduler.release(key)
+            context_cache.reject(key.api_key, cache_key)
+        except RateLimitError as e:
+            logger.warning("Rate limit hit, backing off", extra={"key": key.name, "attempt": attempt})
+            metrics.llm_requests.inc(key=key.name, outcome="rate_limited")
+            key_scheduler.release(key, rate_limited=True, retry_after=e.retry_after)
+            await asyncio.sleep(backoff_delay(attempt))
+        except Exception as e:
+            key_scheduler.release(key, error=True)
+            metrics.llm_requests.inc(key=key.name, outcome="error")
+            logger.error("Error calling Gemini: %s", e, extra={"key": key.name})
+            return CONNECTION_ERROR_MESSAGE
+
+    logger.error("All API keys have hit rate limits")
+    raise LLMOverloaded("All API keys are rate limited", retry_after=key_scheduler.next_available_in())
+
+
+async def stream_response_async(prompt: str, system_instruction: str = None, cache_key: str = None):
+    """
+    Streams a response through the configured provider, yielding text chunks
+    as they are produced. Retries on rate limits only happen before the first
+    chunk arrives; LLMOverloaded is raised if no key could be used at all.
+    """
+    estimated = estimate_tokens(prompt, system_instruction)
+
+    yielded = False
+    for attempt in range(MAX_ATTEMPTS):
+        key = key_scheduler.acquire(estimated)
+        if key is None:
+            delay = _next_key_delay(attempt)
+            if delay is None:
+                break
+            with metrics.span("llm_key_wait"):
+                await asyncio.sleep(delay)
+            continue
+
+        tokens = estimated
+        usage = {}
+        try:
+            cached_content = await _cached_content_for(key, system_instruction, cache_key)
+            body = _build_request_body(prompt, system_instruction, cached_content)
+            async with _get_key_semaphore(key.api_key):
+                # aclosing: a client leaving mid-stream closes the upstream response now, not at GC
+                async with aclosing(provider.stream(key, body)) as chunks:
+                    async for chunk in chunks:
+                        # Each chunk carries the running totals; the last one wins
+                        usage = chunk.get("usageMetadata") or usage
+                        tokens = usage.get("totalTokenCount", tokens)
+                        for candidate in chunk.get("candidates", [])[:1]:
+                            for part in candidate.get("content", {}).get("parts", []):
+                                if part.get("text"):
+                                    yielded = True
+                                    yield part["text"]
+            key_scheduler.release(key, tokens=tokens)
+            metrics.llm_requests.inc(key=key.name, outcome="ok")
+            metrics.record_usage(usage)
+            return
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away mid-stream
+            key_scheduler.release(key, tokens=tokens)
+            raise
+        except CachedContentRejected as e:
+            logger.warning("Cached content rejected, retrying inline: %s", e, extra={"key": key.name})
+            metrics.llm_requests.inc(key=key.name, outcome="cache_rejected")
+            key_scheduler.release(key)
+            context_cache.reject(key.api_key, cache_key)
+        except RateLimitError as e:
+            key_scheduler.release(key, rate_limited=True, retry_after=e.retry_after)
+            metrics.llm_requests.inc(key=key.name, outcome="rate_limited")
+            if yielded:
+                return
+            logger.warning("Rate limit hit, backing off", extra={"key": key.name, "attempt": attempt})
+            await asyncio.sleep(backoff_delay(attempt))
+        except Exception as e:
+            key_scheduler.release(key, error=True)
+            metrics.llm_requests.inc(key=key.name, outcome="error")
+            # Part of the reply already went out, so there is nothing to add
+            if yielded:
+                logger.error("Gemini stream interrupted: %s", e, extra={"key": key.name})
+                return
+            logger.error("Error calling Gemini: %s", e, extra={"key": key.name})
+            yield CONNECTION_ERROR_MESSAGE
+            return
+
+    logger.error("All API keys have hit rate limits")
+    raise LLMOverloaded("All API keys are rate limited", retry_after=key_scheduler.next_available_in())
+
+
+async def expire_cached_context(cache_key: str):
+    """
+    Deletes the server-side cached content for cache_key, e.g. when a session ends.
+    """
+    await provider.expire(cache_key)
+
+
+async def aclose():
+    """
+    Closes the provider's HTTP client used by the async path.
+    """
+    await provider.aclose()
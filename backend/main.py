@@ -1,24 +1,73 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from typing import List, Optional
+from contextlib import asynccontextmanager, nullcontext
+import asyncio
 import uuid
+import weakref
+from urllib.parse import quote
 import json
+import logging
 import os
+import time
+from dotenv import load_dotenv
+
+# Before importing our modules: they read their settings from the environment
+load_dotenv()
 
 # Import our new modules
-from .llm_client import generate_response
+from . import log
+from . import metrics
+from .metrics import span
+from . import llm_client
+from .llm_client import generate_response_async, stream_response_async, estimate_tokens, LLMOverloaded, RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE
+from .admission import Admission, Rejected, retry_after_header, CLIENT_HEADER
 from .prompts import (
-    SYSTEM_PROMPT_TEMPLATE, 
     NEXT_QUESTION_PROMPT, 
     INITIAL_QUESTION_PROMPT, 
-    FEEDBACK_PROMPT
+    END_OF_INTERVIEW_MESSAGE
 )
-from .resume_parser import parse_resume
+from . import resume_parser
+from .resume_parser import parse_resume_async, ResumeParseTimeout, ResumeParseError
+from .streaming import SentenceBuffer, split_sentences
+from .transcript import SessionTranscript, transcript_for_session
+from .resume_profile import profile_from_text
+from .speculation import DraftManager, SPECULATIVE_DRAFTS, DRAFT_MAX_KEY_LOAD
+from .feedback_jobs import FeedbackJobs
+from .response_cache import ResponseCache, RESPONSE_CACHE
+from .persona_logic import classify, get_persona_instruction, HISTORY_WINDOW
+from .session_store import create_session_store
+from .context_builder import build_history, schedule_summary
+from . import audio_utils
+from . import tts
+from .streaming_asr import StreamingTranscriber
+
+log.configure()
+logger = logging.getLogger(__name__)
+
+def _log_preload_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Whisper preload failed, will retry on first use: %s", future.exception())
 
-app = FastAPI(title="Interview Practice Partner API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load Whisper (and torch) in the background: text turns are served right
+    # away, and a voice request that arrives first waits on the same load
+    if audio_utils.WHISPER_PRELOAD:
+        preload = asyncio.get_running_loop().run_in_executor(audio_utils.audio_executor, audio_utils.load_whisper)
+        preload.add_done_callback(_log_preload_failure)
+    # Synthesise fixed phrases in the background so they are cache hits later
+    asyncio.get_running_loop().run_in_executor(audio_utils.audio_executor, tts.warm_cache, [END_OF_INTERVIEW_MESSAGE])
+    yield
+    session_store.close()
+    resume_parser.shutdown()
+    await llm_client.aclose()
+
+app = FastAPI(title="Interview Practice Partner API", lifespan=lifespan)
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse, JSONResponse
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,22 +75,113 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser read /chat_audio's timing and transcript headers, and Retry-After
+    expose_headers=["Server-Timing", "X-Transcript", "X-Agent-Message", "X-Interview-Over", "Retry-After"],
 )
 
+class MetricsMiddleware:
+    """
+    Counts and times requests by route template, so session ids in paths
+    don't become labels. Plain ASGI, so streamed responses are timed to
+    their last chunk and nothing is buffered.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "other"
+            metrics.http_requests.inc(route=path, method=scope["method"], status=str(status))
+            metrics.http_duration.observe(time.perf_counter() - started, route=path)
+
+app.add_middleware(MetricsMiddleware)
+
+# Rate limits per client and session, and a cap on concurrent LLM-bound
+# requests sized to what the API keys can serve at once
+admission = Admission(max(1, len(llm_client.API_KEYS)) * llm_client.MAX_CONCURRENT_PER_KEY)
+
+def _client_id(connection) -> str:
+    if CLIENT_HEADER and connection.headers.get(CLIENT_HEADER):
+        return connection.headers[CLIENT_HEADER]
+    return connection.client.host if connection.client else "unknown"
+
+def _retry_later(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": retry_after_header(retry_after)})
+
+@app.exception_handler(Rejected)
+async def rejected_handler(request: Request, exc: Rejected):
+    return _retry_later(exc.status_code, exc.detail, exc.retry_after)
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloaded):
+    return _retry_later(503, "The interviewer is busy, please retry", exc.retry_after)
+
 # Mount frontend directory
 app.mount("/app", StaticFiles(directory="frontend", html=True), name="frontend")
 
-# In-memory session store
-sessions = {}
+def _on_session_evicted(session_id: str, session: dict):
+    drafts.discard(session_id)
+    feedback_jobs.discard(session_id)
+    transcript = session["transcript"]
+    if transcript.session_scoped_cache and not session["is_over"]:
+        _spawn(llm_client.expire_cached_context(transcript.cache_key))
+
+# Session store (in-memory LRU/TTL by default, SQLite with SESSION_STORE=sqlite)
+session_store = create_session_store(on_evict=_on_session_evicted)
+
+# Mirrors resume_profile.build_profile; anything missing gets a default so a
+# hand-built or stale client profile can't break the digest
+class ResumeRole(BaseModel):
+    title: str = ""
+    organization: str = ""
+    start: str = ""
+    end: str = ""
+    highlights: List[str] = []
+
+class ResumeProject(BaseModel):
+    name: str = ""
+    highlights: List[str] = []
+
+class ResumeProfile(BaseModel):
+    summary: str = ""
+    skills: List[str] = []
+    roles: List[ResumeRole] = []
+    projects: List[ResumeProject] = []
+    education: List[str] = []
+    certifications: List[str] = []
 
 class StartSessionRequest(BaseModel):
     role: str
     experience_level: str = "Junior"
     resume_text: Optional[str] = None
+    # As returned by /upload_resume; derived from resume_text when missing
+    resume_profile: Optional[ResumeProfile] = None
 
 class ChatRequest(BaseModel):
     session_id: str
     user_message: str
+    # Optional client-generated id; a retried turn returns the original reply
+    turn_id: Optional[str] = None
+
+class PartialAnswerRequest(BaseModel):
+    session_id: str
+    # Interim transcript of the answer the candidate is still giving
+    partial_text: str
 
 class ChatResponse(BaseModel):
     agent_message: str
@@ -54,108 +194,595 @@ class FeedbackResponse(BaseModel):
 def health_check():
     return {"status": "ok", "message": "Interview Partner Backend is running"}
 
+@app.get("/stats")
+def stats():
+    return {
+        "keys": llm_client.key_scheduler.stats(),
+        "tts_cache": tts.cache.stats(),
+        "speculation": drafts.stats(),
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "admission": admission.stats(),
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """
+    Request, stage and LLM metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+# Background work spawned by handlers (kept referenced until done)
+_background_tasks = set()
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _llm_request(transcript: SessionTranscript, prompt: str, question_num: int, persona: str = None, persona_instruction: str = None) -> dict:
+    """
+    Builds generate_response_async kwargs, moving the per-turn parts into the
+    prompt when the static system prompt can come from the context cache
+    (caching is on and the prompt is big enough to be cached).
+    """
+    if llm_client.context_cacheable(transcript.cached_instruction):
+        return {
+            "prompt": transcript.turn_context(question_num, persona, persona_instruction) + prompt,
+            "system_instruction": transcript.cached_instruction,
+            "cache_key": transcript.cache_key,
+        }
+    return {
+        "prompt": prompt,
+        "system_instruction": transcript.system_instruction(question_num, persona, persona_instruction),
+    }
+
+# One lock per live session so turns for the same session run one at a time
+_session_locks = weakref.WeakValueDictionary()
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+@asynccontextmanager
+async def _turn(session_id: str):
+    """
+    Held while a turn runs: the in-process lock, then the store's guard
+    against another worker running a turn of the same session.
+    """
+    async with _session_lock(session_id):
+        async with session_store.turn_guard(session_id):
+            yield
+
+async def _remember_turn(session_id: str, session: dict, turn_id: Optional[str], response: ChatResponse):
+    if not turn_id:
+        return
+    # Every answered turn is kept (at most max_questions): a retry can arrive
+    # after any number of later turns and must still be replayed, not counted
+    recent_turns = session.setdefault("recent_turns", [])
+    recent_turns.append([turn_id, response.agent_message, response.is_interview_over])
+    del recent_turns[:-session["max_questions"]]
+    await session_store.update_async(session_id, session, ["recent_turns"])
+
+async def _get_session(session_id: str) -> dict:
+    session = await session_store.get_async(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+async def _record_reply(session_id: str, session: dict, response_text: str):
+    await session_store.append_message_async(session_id, session, "model", response_text)
+    schedule_summary(
+        session_id,
+        session["transcript"],
+        on_update=lambda: session_store.update_async(session_id, session, ["summary", "summarized_upto"]),
+        generate=_generate_in_slot,
+    )
+
+def _end_interview(session: dict):
+    session["is_over"] = True
+    transcript = session["transcript"]
+    if transcript.session_scoped_cache:
+        _spawn(llm_client.expire_cached_context(transcript.cache_key))
+
 # --- Resume Handling ---
 @app.post("/upload_resume")
-async def upload_resume(file: UploadFile = File(...)):
-    content = await file.read()
-    resume_text = parse_resume(content, file.filename)
-    return {"resume_text": resume_text}
+async def upload_resume(http_request: Request, file: UploadFile = File(...)):
+    admission.check(_client_id(http_request))
+    # The form has already been received and spooled (to disk past 1 MB) by
+    # now; reading one byte past the limit keeps an oversized file out of
+    # memory and out of the parser
+    content = await file.read(resume_parser.RESUME_MAX_BYTES + 1)
+    if len(content) > resume_parser.RESUME_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Resume must be under {resume_parser.RESUME_MAX_BYTES // (1024 * 1024)} MB")
+    try:
+        with span("resume_parse"):
+            parsed = await parse_resume_async(content, file.filename or "")
+    except ResumeParseTimeout as e:
+        logger.error("Error parsing resume: %s", e, extra={"upload_bytes": len(content)})
+        raise HTTPException(status_code=422, detail="Resume took too long to parse")
+    except ResumeParseError as e:
+        logger.error("Error parsing resume: %s", e, extra={"upload_bytes": len(content)})
+        raise HTTPException(status_code=503, detail="Resume parser is restarting, please upload again")
+    return {"resume_text": parsed["resume_text"], "resume_profile": parsed["resume_profile"]}
 
 @app.post("/start_session")
-def start_session(request: StartSessionRequest):
+async def start_session(request: StartSessionRequest, http_request: Request):
+    admission.check(_client_id(http_request))
     session_id = str(uuid.uuid4())
     
     # Store resume text if provided
     resume_context = request.resume_text or ""
+    # The prompt gets a digest of the structured profile, built once per session
+    resume_profile = request.resume_profile.dict() if request.resume_profile is not None else None
+    if resume_profile is None and resume_context:
+        with span("resume_profile"):
+            resume_profile = profile_from_text(resume_context)
     
-    sessions[session_id] = {
+    session = {
         "role": request.role,
         "experience_level": request.experience_level,
         "resume_text": resume_context,
-        "history": [],
+        "resume_profile": resume_profile,
         "question_count": 0,
         "max_questions": 15,
-        "is_over": False
+        "is_over": False,
+        "prompt_tokens": []
     }
+    with span("prompt_build"):
+        transcript = session["transcript"] = transcript_for_session(session)
+    await session_store.create_async(session_id, session)
     
     # Generate initial greeting/question using LLM
-    resume_prompt_part = f"\nCandidate Resume:\n{resume_context}\n" if resume_context else ""
-    
-    system_instruction = SYSTEM_PROMPT_TEMPLATE.format(
-        role=request.role,
-        experience_level=request.experience_level,
-        current_question_num=1,
-        max_questions=15
-    ) + resume_prompt_part
+    with span("prompt_build"):
+        llm_request = _llm_request(transcript, INITIAL_QUESTION_PROMPT.format(role=request.role), 1)
     
-    initial_message = generate_response(INITIAL_QUESTION_PROMPT.format(role=request.role), system_instruction=system_instruction)
+    with span("llm_call"):
+        # Without a resume the opening prompt only depends on role and level
+        if response_cache is not None and not resume_context:
+            initial_message = await response_cache.get(**llm_request)
+        else:
+            async with admission.slot():
+                initial_message = await generate_response_async(**llm_request)
     
-    sessions[session_id]["history"].append({"role": "model", "content": initial_message})
+    await session_store.append_message_async(session_id, session, "model", initial_message)
     
     return {"session_id": session_id, "initial_message": initial_message}
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+# Every LLM call holds an admission slot, background ones included: the cap
+# exists to keep the API keys from being oversubscribed, whoever calls them
+async def _generate_in_slot(prompt: str, system_instruction: str = None, **kwargs) -> str:
+    async with admission.slot():
+        return await generate_response_async(prompt, system_instruction, **kwargs)
+
+async def _draft_in_slot(prompt: str, system_instruction: str = None, **kwargs) -> str:
+    # Drafts are optional: take a free slot or give up, never queue ahead of real turns
+    if admission.busy():
+        raise Rejected(503, "No free LLM slot for a draft", admission.limiter.retry_after())
+    return await _generate_in_slot(prompt, system_instruction, **kwargs)
+
+# Pools of opening questions for resume-less sessions (misses and top-ups)
+response_cache = (
+    ResponseCache(_generate_in_slot, reject=(RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE))
+    if RESPONSE_CACHE else None
+)
+
+# Feedback is generated in the background as soon as the interview ends
+feedback_jobs = FeedbackJobs(_generate_in_slot, session_store, reject=(RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE))
+
+# Speculative drafts of the next question, started from interim transcripts
+drafts = DraftManager(_draft_in_slot, reject=(RATE_LIMIT_MESSAGE, CONNECTION_ERROR_MESSAGE))
+
+async def _begin_chat_turn(request: ChatRequest):
+    """
+    Records the user's answer and builds the next-question prompt.
+
+    Returns (session, final_response, llm_request, draft). When final_response
+    is set the turn is finished and no LLM call is needed. draft is a
+    speculative reply that still fits the final answer, or None.
+
+    Callers must hold _turn() until the reply has been recorded.
+    """
     session_id = request.session_id
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = sessions[session_id]
+    session = await _get_session(session_id)
+
+    # Retry of a turn we already answered: replay the reply
+    if request.turn_id:
+        for turn_id, agent_message, is_over in session.get("recent_turns", []):
+            if turn_id == request.turn_id:
+                return session, ChatResponse(agent_message=agent_message, is_interview_over=is_over), None, None
     
     if session["is_over"]:
-        return ChatResponse(agent_message="The interview is already over. Please request feedback.", is_interview_over=True)
+        return session, ChatResponse(agent_message="The interview is already over. Please request feedback.", is_interview_over=True), None, None
 
-    # Record user message
-    session["history"].append({"role": "user", "content": request.user_message})
+    transcript = session["transcript"]
+    # The same answer again after its reply failed (e.g. 503): it is already
+    # recorded and counted, so only the reply is generated this time
+    unanswered = bool(transcript.messages) and transcript.messages[-1] == {"role": "user", "content": request.user_message}
+    if not unanswered:
+        # Refuse before recording anything when no key could take the call in time
+        wait = llm_client.key_scheduler.next_available_in() if llm_client.API_KEYS else 0.0
+        if wait > llm_client.MAX_KEY_WAIT:
+            raise LLMOverloaded("All API keys are rate limited", retry_after=wait)
+        # Record user message
+        await session_store.append_message_async(session_id, session, "user", request.user_message)
+    base_length = len(transcript) - 1
     
     # Detect persona
-    from .persona_logic import detect_persona, get_persona_instruction
-    persona = detect_persona(request.user_message, session["history"])
-    persona_instruction = get_persona_instruction(persona)
+    with span("persona"):
+        persona = classify(request.user_message, transcript.recent_word_counts)
+        persona_instruction = get_persona_instruction(persona)
     
-    # Prepare context for LLM
-    conversation_history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in session["history"]])
-    
-    session["question_count"] += 1
+    if not unanswered:
+        session["question_count"] += 1
     
     # Check if we should end the interview
     if session["question_count"] >= session["max_questions"]:
-        session["is_over"] = True
-        response_text = "Thank you for your time today. That covers all the questions I had planned. Let me now provide you with detailed feedback on your performance."
-        session["history"].append({"role": "model", "content": response_text})
-        return ChatResponse(agent_message=response_text, is_interview_over=True)
+        _end_interview(session)
+        response_text = END_OF_INTERVIEW_MESSAGE
+        await session_store.update_async(session_id, session, ["question_count", "is_over"])
+        await session_store.append_message_async(session_id, session, "model", response_text)
+        final_response = ChatResponse(agent_message=response_text, is_interview_over=True)
+        await _remember_turn(session_id, session, request.turn_id, final_response)
+        drafts.discard(session_id)
+        feedback_jobs.start(session_id, session)
+        return session, final_response, None, None
     
     # Generate next question with persona awareness
-    resume_context = session.get("resume_text", "")
-    resume_prompt_part = f"\nCandidate Resume:\n{resume_context}\n" if resume_context else ""
-
-    system_instruction = SYSTEM_PROMPT_TEMPLATE.format(
-        role=session["role"],
-        experience_level=session["experience_level"],
-        current_question_num=session["question_count"] + 1,
-        max_questions=session["max_questions"]
-    ) + resume_prompt_part + f"\n\nDETECTED PERSONA: {persona.upper()}\n{persona_instruction}"
-    
-    prompt = NEXT_QUESTION_PROMPT.format(conversation_history=conversation_history_str)
-    response_text = generate_response(prompt, system_instruction=system_instruction)
-    
-    session["history"].append({"role": "model", "content": response_text})
+    with span("prompt_build"):
+        prompt = NEXT_QUESTION_PROMPT.format(conversation_history=build_history(transcript))
+        llm_request = _llm_request(transcript, prompt, session["question_count"] + 1, persona, persona_instruction)
+
+    # Track prompt size per turn to see what the context budget saves
+    prompt_tokens = estimate_tokens(llm_request["prompt"], llm_request["system_instruction"])
+    session["prompt_tokens"].append(prompt_tokens)
+    await session_store.update_async(session_id, session, ["question_count", "prompt_tokens"])
+    logger.info("chat turn", extra={
+        "session_id": session_id,
+        "question": session["question_count"] + 1,
+        "persona": persona,
+        "prompt_tokens": prompt_tokens,
+    })
+    draft = drafts.claim(session_id, request.user_message, base_length, persona)
+    return session, None, llm_request, draft
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest, http_request: Request):
+    admission.check(_client_id(http_request), request.session_id)
+    return await _chat_turn(request)
+
+async def _chat_turn(request: ChatRequest) -> ChatResponse:
+    async with _turn(request.session_id):
+        session, final_response, llm_request, draft = await _begin_chat_turn(request)
+        if final_response is not None:
+            return final_response
+
+        with span("llm_call"):
+            response_text = await drafts.result(draft) if draft is not None else None
+            if response_text is None:
+                async with admission.slot():
+                    response_text = await generate_response_async(**llm_request)
+        
+        await _record_reply(request.session_id, session, response_text)
+        response = ChatResponse(agent_message=response_text, is_interview_over=False)
+        await _remember_turn(request.session_id, session, request.turn_id, response)
     
-    return ChatResponse(agent_message=response_text, is_interview_over=False)
+    return response
+
+@app.post("/chat_stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Streaming variant of /chat. Emits newline-delimited JSON events:
+    {"type": "sentence", "text": ...} as each sentence completes, then
+    {"type": "done", "agent_message", "is_interview_over", "ttft_ms", "total_ms"}.
+    Overload after the stream has started is reported as
+    {"type": "error", "status", "detail", "retry_after"}.
+    """
+    # Fail fast with a real 404, 429 or 503; the turn itself runs under the
+    # session lock inside the stream so the lock is released however it ends
+    await _get_session(request.session_id)
+    admission.check(_client_id(http_request), request.session_id)
+    admission.check_capacity()
+
+    async def events():
+        async with _turn(request.session_id):
+            async for event in _chat_stream_events(request):
+                yield event
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+async def _chat_stream_events(request: ChatRequest):
+    """
+    Runs one streamed turn. Callers hold _turn().
+    """
+    try:
+        session, final_response, llm_request, draft = await _begin_chat_turn(request)
+    except LLMOverloaded as e:
+        # The stream has already started with 200, so report it in-band
+        yield json.dumps(_overload_event(e)) + "\n"
+        return
+    started = time.perf_counter()
+    if final_response is not None:
+        for sentence in split_sentences(final_response.agent_message):
+            yield json.dumps({"type": "sentence", "text": sentence}) + "\n"
+        yield json.dumps({"type": "done", **final_response.dict(), "ttft_ms": 0.0, "total_ms": 0.0}) + "\n"
+        return
+
+    drafted = await drafts.result(draft) if draft is not None else None
+    buffer = SentenceBuffer()
+    chunks = []
+    ttft_ms = None
+    try:
+        # A fitting draft is replayed as a single chunk
+        async with (admission.slot() if drafted is None else nullcontext()):
+            stream = _replay(drafted) if drafted is not None else stream_response_async(**llm_request)
+            async for chunk in stream:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                chunks.append(chunk)
+                for sentence in buffer.feed(chunk):
+                    yield json.dumps({"type": "sentence", "text": sentence}) + "\n"
+    except (Rejected, LLMOverloaded) as e:
+        # No reply is recorded; the same answer sent again is answered, not recorded twice
+        yield json.dumps(_overload_event(e)) + "\n"
+        return
+    for sentence in buffer.flush():
+        yield json.dumps({"type": "sentence", "text": sentence}) + "\n"
+
+    response_text = "".join(chunks).strip()
+    await _record_reply(request.session_id, session, response_text)
+    await _remember_turn(request.session_id, session, request.turn_id, ChatResponse(agent_message=response_text))
+
+    total_ms = (time.perf_counter() - started) * 1000
+    metrics.stage_duration.observe((ttft_ms or total_ms) / 1000, stage="llm_first_token")
+    metrics.stage_duration.observe(total_ms / 1000, stage="llm_call")
+    logger.info("chat_stream turn", extra={
+        "session_id": request.session_id,
+        "ttft_ms": round(ttft_ms or total_ms, 1),
+        "total_ms": round(total_ms, 1),
+    })
+    yield json.dumps({
+        "type": "done",
+        "agent_message": response_text,
+        "is_interview_over": False,
+        "prompt_tokens": session["prompt_tokens"][-1],
+        "ttft_ms": round(ttft_ms or total_ms, 1),
+        "total_ms": round(total_ms, 1),
+    }) + "\n"
+
+def _overload_event(e: Exception) -> dict:
+    """
+    The in-band form of a 429/503 for streams and WebSockets.
+    """
+    status_code = e.status_code if isinstance(e, Rejected) else 503
+    return {"type": "error", "status": status_code, "detail": str(e), "retry_after": int(retry_after_header(e.retry_after))}
+
+async def _replay(text: str):
+    yield text
+
+@app.post("/chat/partial")
+async def chat_partial(request: PartialAnswerRequest):
+    """
+    Interim transcript of the answer in progress. Drafts the next question
+    in the background so /chat can reuse it if the final answer still
+    matches. Returns whether a new draft was started.
+    """
+    session = await _get_session(request.session_id)
+    words = len(request.partial_text.split())
+    if (not SPECULATIVE_DRAFTS or session["is_over"] or words < 3
+            or session["question_count"] + 1 >= session["max_questions"]
+            or _session_lock(request.session_id).locked() or admission.busy()
+            or not llm_client.key_scheduler.has_spare_budget(DRAFT_MAX_KEY_LOAD)):
+        # Drafts are optional work; skip them when the LLM slots or key budgets are needed for real turns
+        return {"drafting": False}
+
+    # Same prompt the turn would build if this were the final answer
+    transcript = session["transcript"]
+    recent = (list(transcript.recent_word_counts) + [("user", words)])[-HISTORY_WINDOW:]
+    persona = classify(request.partial_text, recent)
+    history = build_history(transcript)
+    history += ("\n" if history else "") + f"user: {request.partial_text}"
+    llm_request = _llm_request(
+        transcript,
+        NEXT_QUESTION_PROMPT.format(conversation_history=history),
+        session["question_count"] + 2,
+        persona,
+        get_persona_instruction(persona),
+    )
+    started = drafts.propose(request.session_id, request.partial_text, len(transcript), persona, llm_request)
+    return {"drafting": started}
 
 @app.post("/feedback", response_model=FeedbackResponse)
-def get_feedback(request: ChatRequest):
-    session_id = request.session_id
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = sessions[session_id]
-    
-    conversation_history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in session["history"]])
+async def get_feedback(request: ChatRequest, http_request: Request):
+    session = await _get_session(request.session_id)
+    admission.check(_client_id(http_request), request.session_id)
     
-    prompt = FEEDBACK_PROMPT.format(conversation_history=conversation_history_str)
-    
-    feedback_text = generate_response(prompt)
+    # Usually already generated (or in progress) since the interview ended
+    with span("feedback_wait"):
+        feedback_text = await feedback_jobs.result(request.session_id, session)
     
     # Return as plain text in a simple dict
     return FeedbackResponse(feedback={"spoken_feedback": feedback_text})
+
+@app.get("/feedback/{session_id}/status")
+async def feedback_status(session_id: str):
+    """
+    Progress of the background feedback job: not_started, running, ready or failed.
+    """
+    session = await _get_session(session_id)
+    return feedback_jobs.status(session_id, session)
+
+# --- Voice Mode ---
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Reads the request body, refusing with 413 (before reading anything when
+    Content-Length says so) once it grows past max_bytes.
+    """
+    too_large = HTTPException(status_code=413, detail=f"Upload must be under {max_bytes // (1024 * 1024)} MB")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise too_large
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@app.post("/chat_audio")
+async def chat_audio(session_id: str, request: Request):
+    """
+    Voice turn: transcribe -> chat -> synthesize.
+
+    The request body is the raw recording (any format ffmpeg reads, at most
+    AUDIO_MAX_MB) and is kept in memory. Returns the reply as audio in the TTS backend's format
+    (tts.get_backend().media_type); per-stage timings are in the
+    Server-Timing header and the texts in URL-encoded X-* headers.
+    """
+    await _get_session(session_id)
+    admission.check(_client_id(request), session_id)
+    audio_bytes = await _read_body(request, audio_utils.AUDIO_MAX_BYTES)
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="Empty audio upload")
+
+    loop = asyncio.get_running_loop()
+    timings = {}
+
+    started = time.perf_counter()
+    try:
+        samples = await loop.run_in_executor(audio_utils.audio_executor, audio_utils.decode_audio, audio_bytes)
+    except Exception as e:
+        logger.error("Error decoding audio: %s", e, extra={"session_id": session_id, "upload_bytes": len(audio_bytes)})
+        raise HTTPException(status_code=415, detail="Could not decode audio")
+    timings["decode"] = time.perf_counter() - started
+
+    # Trim silence before Whisper so it only sees the speech
+    started = time.perf_counter()
+    samples = await loop.run_in_executor(audio_utils.audio_executor, audio_utils.preprocess_audio, samples)
+    timings["vad"] = time.perf_counter() - started
+    if not len(samples):
+        raise HTTPException(status_code=422, detail="No speech detected")
+
+    started = time.perf_counter()
+    user_message = await audio_utils.transcribe_async(samples)
+    timings["asr"] = time.perf_counter() - started
+    if not user_message:
+        raise HTTPException(status_code=422, detail="No speech detected")
+
+    started = time.perf_counter()
+    turn = ChatRequest(session_id=session_id, user_message=user_message, turn_id=request.headers.get("X-Turn-Id"))
+    response = await _chat_turn(turn)
+    timings["llm"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        speech = await loop.run_in_executor(audio_utils.audio_executor, audio_utils.synthesize_speech, response.agent_message)
+    except Exception as e:
+        logger.error("Error generating speech: %s", e, extra={"session_id": session_id})
+        raise HTTPException(status_code=502, detail="Speech synthesis failed")
+    timings["tts"] = time.perf_counter() - started
+    for stage, seconds in timings.items():
+        metrics.stage_duration.observe(seconds, stage=f"audio_{stage}")
+
+    return Response(
+        content=speech,
+        media_type=tts.get_backend().media_type,
+        headers={
+            "Server-Timing": ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()),
+            "X-Transcript": quote(user_message),
+            "X-Agent-Message": quote(response.agent_message),
+            "X-Interview-Over": "true" if response.is_interview_over else "false",
+        },
+    )
+
+@app.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket, session_id: str):
+    """
+    Streaming voice turn over a WebSocket.
+
+    The client sends 16 kHz mono PCM16 as binary frames while the candidate
+    speaks (and may send {"type": "end"} to force the end of the answer).
+    The server replies with {"type": "partial"} transcripts about once a
+    second, a {"type": "final"} transcript as soon as trailing silence is
+    detected, then {"type": "reply"} and the audio of the reply as a binary
+    frame per sentence (in the reply's "audio_type", the TTS backend's
+    media_type), followed by {"type": "audio_end"}. The client should
+    pause streaming until the reply has played. A turn refused for load gets
+    {"type": "error", "status", "detail", "retry_after"} instead of a reply.
+    """
+    await websocket.accept()
+    if await session_store.get_async(session_id) is None:
+        await websocket.close(code=4404, reason="Session not found")
+        return
+
+    transcriber = StreamingTranscriber(audio_utils.transcribe_async)
+    partial_task = None
+
+    async def send_partial():
+        text = await transcriber.partial()
+        if text:
+            await websocket.send_json({"type": "partial", "text": text})
+            await chat_partial(PartialAnswerRequest(session_id=session_id, partial_text=text))
+
+    async def finish_utterance():
+        nonlocal partial_task
+        ended = time.perf_counter()
+        if partial_task is not None:
+            await partial_task
+            partial_task = None
+        user_message = await transcriber.finalize()
+        timings = {"asr_final": time.perf_counter() - ended}
+        await websocket.send_json({"type": "final", "text": user_message})
+        if not user_message:
+            return
+
+        started = time.perf_counter()
+        try:
+            admission.check(_client_id(websocket), session_id)
+            response = await _chat_turn(ChatRequest(session_id=session_id, user_message=user_message))
+        except (Rejected, LLMOverloaded) as e:
+            # Reported instead of closing the socket; the candidate can answer again after retry_after
+            await websocket.send_json(_overload_event(e))
+            return
+        timings["llm"] = time.perf_counter() - started
+        await websocket.send_json({
+            "type": "reply",
+            "agent_message": response.agent_message,
+            "is_interview_over": response.is_interview_over,
+            "audio_type": tts.get_backend().media_type,
+            "timings_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()},
+        })
+        # One clip per sentence so playback starts after the first is ready
+        loop = asyncio.get_running_loop()
+        try:
+            for sentence in split_sentences(response.agent_message):
+                speech = await loop.run_in_executor(audio_utils.audio_executor, tts.synthesize, sentence)
+                await websocket.send_bytes(speech)
+        except Exception as e:
+            logger.error("Error generating speech: %s", e, extra={"session_id": session_id})
+        await websocket.send_json({"type": "audio_end"})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                ended = transcriber.feed(message["bytes"])
+                if ended:
+                    await finish_utterance()
+                elif partial_task is None or partial_task.done():
+                    # At most one partial decode in flight per connection
+                    partial_task = asyncio.create_task(send_partial())
+            elif message.get("text"):
+                if json.loads(message["text"]).get("type") == "end":
+                    await finish_utterance()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if partial_task is not None:
+            partial_task.cancel()
@@ -0,0 +1,154 @@
+"""
+Minimal Prometheus-style metrics: counters, histograms and stage spans,
+rendered in the text exposition format for GET /metrics.
+
+No external dependency; each update is a dict lookup and an addition under
+a lock, cheap enough to leave on for every request.
+"""
+import bisect
+import threading
+import time
+
+# Seconds; covers sub-millisecond CPU stages up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(map(labels.__getitem__, self.labelnames))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(map(labels.__getitem__, self.labelnames)), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (non-cumulative, +Inf last), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(map(labels.__getitem__, self.labelnames))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "interview_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+http_duration = registry.histogram(
+    "interview_http_request_duration_seconds", "HTTP request latency by route.", ("route",))
+stage_duration = registry.histogram(
+    "interview_stage_duration_seconds", "Time spent in each stage of a request.", ("stage",))
+
+llm_requests = registry.counter(
+    "interview_llm_requests_total", "Gemini calls by key and outcome (ok, rate_limited, error).", ("key", "outcome"))
+llm_prompt_tokens = registry.counter(
+    "interview_llm_prompt_tokens_total", "Prompt tokens reported by Gemini usageMetadata.")
+llm_completion_tokens = registry.counter(
+    "interview_llm_completion_tokens_total", "Completion tokens reported by Gemini usageMetadata.")
+llm_cached_tokens = registry.counter(
+    "interview_llm_cached_tokens_total", "Prompt tokens served from the context cache.")
+
+
+class span:
+    """
+    Times the enclosed block into interview_stage_duration_seconds{stage}.
+    A plain class rather than @contextmanager, which costs a generator per use.
+    """
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stage_duration.observe(time.perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+def record_usage(usage: dict):
+    """
+    Adds a response's usageMetadata to the token counters.
+    """
+    if not usage:
+        return
+    llm_prompt_tokens.inc(usage.get("promptTokenCount", 0))
+    llm_completion_tokens.inc(usage.get("candidatesTokenCount", 0))
+    if usage.get("cachedContentTokenCount"):
+        llm_cached_tokens.inc(usage["cachedContentTokenCount"])
@@ -2,57 +2,110 @@
 Persona detection and handling logic for adaptive interview behavior.
 """
 
-def detect_persona(user_message: str, conversation_history: list) -> str:
+from collections import deque
+
+# Keyword families, matched as substrings of the lowercased message
+EDGE_KEYWORDS = ["make me ceo", "give me job", "hire me now", "your weights", "your model",
+                 "banana", "asdfgh", "blah blah", "random gibberish"]
+SHORT_OK_KEYWORDS = ["yes", "no", "okay", "sure"]
+CONFUSED_KEYWORDS = ["i don't know", "not sure", "what do you mean", "don't understand",
+                     "confused", "unclear", "help", "what is", "explain"]
+OFFTOPIC_KEYWORDS = ["by the way", "also", "speaking of", "reminds me", "funny story"]
+
+FAMILIES = {
+    "edge": EDGE_KEYWORDS,
+    "short_ok": SHORT_OK_KEYWORDS,
+    "confused": CONFUSED_KEYWORDS,
+    "offtopic": OFFTOPIC_KEYWORDS,
+}
+
+# Messages considered for the "repeatedly short answers" rule
+HISTORY_WINDOW = 6
+
+
+def _matcher(keywords: list):
     """
-    Detects user persona based on their response patterns.
-    
+    Returns a predicate telling whether any keyword occurs in a lowercased
+    message. For keyword sets this small, CPython's substring search beats
+    a combined regex or a pure-Python automaton by several times, so the
+    "compiled" form is a frozen tuple scanned with `in`.
+    """
+    keywords = tuple(keywords)
+    return lambda text: any(map(text.__contains__, keywords))
+
+
+_MATCHERS = {family: _matcher(keywords) for family, keywords in FAMILIES.items()}
+
+
+def classify(user_message: str, recent: list) -> str:
+    """
+    Detects user persona from the message and (role, word_count) pairs for
+    the last HISTORY_WINDOW messages, including this one.
+
     Returns: "confused", "efficient", "chatty", "edge", or "normal"
     """
     message_lower = user_message.lower().strip()
     word_count = len(user_message.split())
-    
+
     # Edge Case Detection
-    edge_keywords = ["make me ceo", "give me job", "hire me now", "your weights", "your model", 
-                     "banana", "asdfgh", "blah blah", "random gibberish"]
-    if any(keyword in message_lower for keyword in edge_keywords):
+    if _MATCHERS["edge"](message_lower):
         return "edge"
-    
-    if word_count < 3 and not any(word in message_lower for word in ["yes", "no", "okay", "sure"]):
+    if word_count < 3 and not _MATCHERS["short_ok"](message_lower):
         return "edge"
-    
+
     # Confused Detection
-    confused_keywords = ["i don't know", "not sure", "what do you mean", "don't understand", 
-                        "confused", "unclear", "help", "what is", "explain"]
-    if any(keyword in message_lower for keyword in confused_keywords):
+    if _MATCHERS["confused"](message_lower):
         return "confused"
-    
+
     # Very short answers repeatedly
     if word_count <= 5:
-        # Check history for pattern of short answers
-        recent_user_messages = [msg["content"] for msg in conversation_history[-6:] if msg["role"] == "user"]
-        if len(recent_user_messages) >= 2:
-            avg_length = sum(len(m.split()) for m in recent_user_messages) / len(recent_user_messages)
-            if avg_length < 8:
-                return "confused"
-    
+        user_counts = [count for role, count in recent if role == "user"]
+        if len(user_counts) >= 2 and sum(user_counts) / len(user_counts) < 8:
+            return "confused"
+
     # Efficient Detection
     if 5 < word_count <= 25:
         # Concise but complete
         return "efficient"
-    
+
     # Chatty Detection
     if word_count > 100:
         return "chatty"
-    
+
     # Check for off-topic rambling
-    if word_count > 60:
-        offtopic_keywords = ["by the way", "also", "speaking of", "reminds me", "funny story"]
-        if any(keyword in message_lower for keyword in offtopic_keywords):
-            return "chatty"
-    
+    if word_count > 60 and _MATCHERS["offtopic"](message_lower):
+        return "chatty"
+
     return "normal"
 
 
+def detect_persona(user_message: str, conversation_history: list) -> str:
+    """
+    Detects user persona based on their response patterns.
+
+    Prefer classify() with a transcript's rolling stats; this recomputes
+    them from the message list.
+
+    Returns: "confused", "efficient", "chatty", "edge", or "normal"
+    """
+    recent = [(msg["role"], len(msg["content"].split())) for msg in conversation_history[-HISTORY_WINDOW:]]
+    return classify(user_message, recent)
+
+
+def score_transcript(messages: list) -> list:
+    """
+    Personas for every user message of a transcript, as live detection
+    would have assigned them (each sees the history up to and including it).
+    """
+    recent = deque(maxlen=HISTORY_WINDOW)
+    personas = []
+    for msg in messages:
+        recent.append((msg["role"], len(msg["content"].split())))
+        if msg["role"] == "user":
+            personas.append(classify(msg["content"], recent))
+    return personas
+
+
 def get_persona_instruction(persona: str) -> str:
     """
     Returns specific instructions for handling detected persona.
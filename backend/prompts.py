@@ -276,3 +276,22 @@ Provide detailed, structured feedback in a clear format.
 
 Be specific, actionable, and supportive. Use bullet points, not paragraphs.
 """
+
+END_OF_INTERVIEW_MESSAGE = "Thank you for your time today. That covers all the questions I had planned. Let me now provide you with detailed feedback on your performance."
+
+SUMMARY_PROMPT = """
+You are keeping notes on an ongoing mock interview so the interviewer does not need the full transcript.
+
+Existing notes (may be empty):
+{previous_summary}
+
+New part of the transcript:
+{new_turns}
+
+Update the notes. Keep them under 200 words, as bullet points:
+- Topics and questions already covered (so they are not repeated)
+- Key facts the candidate shared (projects, skills, numbers)
+- Strong and weak points observed so far
+
+Output ONLY the updated notes.
+"""
@@ -0,0 +1,123 @@
+"""
+Response cache for prompts that repeat exactly, such as the opening question
+of a session without a resume (the same for every candidate with the same
+role and experience level).
+
+Each distinct (normalised prompt, system instruction) keeps a pool of up to
+RESPONSE_CACHE_VARIANTS different replies so candidates don't all get the
+same greeting. The first request for a key waits for the LLM; after that a
+random pooled reply is served immediately while the pool tops itself up in
+the background.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import time
+from collections import OrderedDict
+
+from . import metrics
+
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "1") == "1"
+RESPONSE_CACHE_VARIANTS = int(os.getenv("RESPONSE_CACHE_VARIANTS", "5"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+RESPONSE_CACHE_MAX_KEYS = int(os.getenv("RESPONSE_CACHE_MAX_KEYS", "1024"))
+
+cache_requests = metrics.registry.counter(
+    "interview_response_cache_requests_total", "Response cache lookups by result (hit, miss).", ("result",))
+
+
+def normalize(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def cache_key_for(prompt: str, system_instruction: str = None) -> str:
+    digest = hashlib.sha256(normalize(prompt).encode("utf-8"))
+    digest.update(b"\0" + normalize(system_instruction).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU of reply pools with a TTL per pool, in front of an async generate
+    function taking generate_response_async's arguments.
+    """
+
+    def __init__(self, generate, variants: int = RESPONSE_CACHE_VARIANTS, ttl: float = RESPONSE_CACHE_TTL,
+                 max_keys: int = RESPONSE_CACHE_MAX_KEYS, reject=(), clock=time.monotonic, rng=None):
+        self.generate = generate
+        self.variants = max(1, variants)
+        self.ttl = ttl
+        self.max_keys = max_keys
+        # Replies that are errors, never cached (e.g. rate-limit apologies)
+        self.reject = set(reject)
+        self.clock = clock
+        self.random = rng or random.Random()
+        self._pools = OrderedDict()
+        # key -> task generating a reply for that key (first fill or top-up)
+        self._pending = {}
+        self.counters = {"hits": 0, "misses": 0, "refills": 0, "duplicates": 0}
+
+    def _pool(self, key: str):
+        pool = self._pools.get(key)
+        if pool is not None and self.clock() - pool["created_at"] > self.ttl:
+            del self._pools[key]
+            pool = None
+        return pool
+
+    async def get(self, prompt: str, system_instruction: str = None, **kwargs) -> str:
+        key = cache_key_for(prompt, system_instruction)
+        pool = self._pool(key)
+        if pool is not None and pool["replies"]:
+            self._pools.move_to_end(key)
+            self.counters["hits"] += 1
+            cache_requests.inc(result="hit")
+            if len(pool["replies"]) < self.variants and pool["attempts"] < 2 * self.variants:
+                self._fill(key, prompt, system_instruction, kwargs)
+            return self.random.choice(pool["replies"])
+
+        self.counters["misses"] += 1
+        cache_requests.inc(result="miss")
+        # Concurrent misses for one key share a single LLM call; shield keeps
+        # a disconnecting caller from cancelling it for the others
+        return await asyncio.shield(self._fill(key, prompt, system_instruction, kwargs))
+
+    def _fill(self, key: str, prompt: str, system_instruction: str, kwargs: dict) -> asyncio.Task:
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(self._generate(key, prompt, system_instruction, kwargs))
+            # Background top-ups have no awaiter; callers that await still see the exception
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _generate(self, key: str, prompt: str, system_instruction: str, kwargs: dict) -> str:
+        try:
+            text = await self.generate(prompt, system_instruction, **kwargs)
+        finally:
+            self._pending.pop(key, None)
+        if not text or text in self.reject:
+            return text
+
+        pool = self._pool(key)
+        if pool is None:
+            pool = self._pools[key] = {"replies": [], "attempts": 0, "created_at": self.clock()}
+            if len(self._pools) > self.max_keys:
+                self._pools.popitem(last=False)
+        else:
+            self.counters["refills"] += 1
+        # Bounded, so a model that always answers identically stops being asked
+        pool["attempts"] += 1
+        if text in pool["replies"]:
+            self.counters["duplicates"] += 1
+        elif len(pool["replies"]) < self.variants:
+            pool["replies"].append(text)
+        return text
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "keys": len(self._pools),
+            "replies": sum(len(pool["replies"]) for pool in self._pools.values()),
+            "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+        }
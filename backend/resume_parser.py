@@ -1,25 +1,173 @@
+import asyncio
+import hashlib
 import io
-from pypdf import PdfReader
-from docx import Document
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-def parse_resume(file_content: bytes, filename: str) -> str:
+from .resume_profile import build_profile
+
+logger = logging.getLogger(__name__)
+
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_MB", "10")) * 1024 * 1024
+RESUME_PARSE_TIMEOUT = float(os.getenv("RESUME_PARSE_TIMEOUT", "20"))
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", "2"))
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "256"))
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+UNSUPPORTED_MESSAGE = "Unsupported file format. Please upload PDF or DOCX."
+
+
+class ResumeParseTimeout(Exception):
+    """Raised when a resume takes longer than RESUME_PARSE_TIMEOUT to parse."""
+
+
+class ResumeParseError(Exception):
+    """Raised when the parser workers died under a parse twice in a row."""
+
+
+def _docx_lines(file_content: bytes) -> list:
     """
-    Extracts text from PDF or DOCX resume.
+    Paragraphs and table rows in document order, with headings flagged
+    (heading/title styles, or short paragraphs that are bold throughout).
+    """
+    from docx import Document
+
+    doc = Document(io.BytesIO(file_content))
+    body = doc.element.body
+    paragraphs = {p._p: p for p in doc.paragraphs}
+    tables = {t._tbl: t for t in doc.tables}
+    lines = []
+    for child in body.iterchildren():
+        if child in paragraphs:
+            para = paragraphs[child]
+            style = (para.style.name if para.style is not None else "").lower()
+            runs = [run for run in para.runs if run.text.strip()]
+            bold = bool(runs) and all(run.bold for run in runs) and len(para.text.split()) <= 5
+            lines.append((para.text, style.startswith(("heading", "title")) or bold))
+        elif child in tables:
+            for row in tables[child].rows:
+                # Merged cells repeat; "Label | values" rows become "Label: values"
+                cells = list(dict.fromkeys(cell.text.strip() for cell in row.cells if cell.text.strip()))
+                lines.append((f"{cells[0]}: {', '.join(cells[1:])}" if len(cells) > 1 else "".join(cells), False))
+    return lines
+
+def _pdf_lines(file_content: bytes) -> list:
+    """
+    Text lines of every page; layout mode keeps columns and dates on the
+    line they belong to when the installed pypdf supports it.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(file_content))
+    lines = []
+    for page in reader.pages:
+        try:
+            text = page.extract_text(extraction_mode="layout")
+        except TypeError:
+            text = page.extract_text()
+        lines.extend((line, False) for line in (text or "").splitlines())
+    return lines
+
+def parse_resume_document(file_content: bytes, filename: str) -> dict:
+    """
+    Extracts the text and a structured profile (skills, roles, projects,
+    education) from a PDF or DOCX resume.
     """
-    text = ""
     try:
         if filename.lower().endswith('.pdf'):
-            reader = PdfReader(io.BytesIO(file_content))
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            lines = _pdf_lines(file_content)
         elif filename.lower().endswith('.docx'):
-            doc = Document(io.BytesIO(file_content))
-            for para in doc.paragraphs:
-                text += para.text + "\n"
+            lines = _docx_lines(file_content)
         else:
-            return "Unsupported file format. Please upload PDF or DOCX."
-            
-        return text.strip()
+            return {"resume_text": UNSUPPORTED_MESSAGE, "resume_profile": None}
+
+        text = "\n".join(" ".join(line.split()) for line, _ in lines)
+        return {"resume_text": text.strip(), "resume_profile": build_profile(lines)}
     except Exception as e:
-        print(f"Error parsing resume: {e}")
-        return ""
+        logger.error("Error parsing resume: %s", e)
+        return {"resume_text": "", "resume_profile": None}
+
+def parse_resume(file_content: bytes, filename: str) -> str:
+    """
+    Extracts text from PDF or DOCX resume.
+    """
+    return parse_resume_document(file_content, filename)["resume_text"]
+
+
+# Parsing is CPU-bound pure Python, so it runs in worker processes rather
+# than threads. "spawn" keeps the workers free of the server's threads and
+# loaded models; they only import this module.
+_pool = None
+_cache = OrderedDict()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=RESUME_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def _reset_pool(pool: ProcessPoolExecutor):
+    """
+    Kills pool's workers (a running parse cannot be cancelled otherwise) and
+    lets the next call start a fresh pool. A pool that was already replaced
+    is left alone, so a second reset never kills the fresh one.
+    """
+    global _pool
+    if pool is None or _pool is not pool:
+        return
+    _pool = None
+    for process in list(getattr(pool, "_processes", {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _cache_key(file_content: bytes, filename: str) -> str:
+    # The extension picks the parser, so it is part of the key
+    extension = os.path.splitext(filename.lower())[1]
+    return f"{extension}:{hashlib.sha256(file_content).hexdigest()}"
+
+async def parse_resume_async(file_content: bytes, filename: str) -> dict:
+    """
+    Parses a resume (text and profile, see parse_resume_document) in the
+    process pool, with a per-file timeout. Results are cached by content
+    hash, so re-uploading the same file is free.
+    """
+    if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        return {"resume_text": UNSUPPORTED_MESSAGE, "resume_profile": None}
+
+    key = _cache_key(file_content, filename)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    loop = asyncio.get_running_loop()
+    # A pool is reset (its workers killed) when any parse on it times out, so
+    # an innocent parse running alongside is resubmitted once to the new pool
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            future = loop.run_in_executor(pool, parse_resume_document, file_content, filename)
+            result = await asyncio.wait_for(future, RESUME_PARSE_TIMEOUT)
+            break
+        except asyncio.TimeoutError:
+            _reset_pool(pool)
+            raise ResumeParseTimeout(f"Parsing {filename} took longer than {RESUME_PARSE_TIMEOUT:.0f}s")
+        except BrokenProcessPool as e:
+            logger.warning("Resume parser pool was restarted under a parse: %s", e, extra={"attempt": attempt})
+            _reset_pool(pool)
+    else:
+        raise ResumeParseError(f"Resume parser workers died while parsing {filename}")
+
+    _cache[key] = result
+    if len(_cache) > RESUME_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,204 @@
+"""
+Structured resume profile and the compact digest the interviewer sees.
+
+The parser turns a resume into (text, is_heading) lines once per upload;
+build_profile groups them into skills, roles, projects and education, and
+resume_digest renders the most relevant parts within a character budget
+instead of pasting the whole document into every turn's prompt.
+"""
+import os
+import re
+
+RESUME_DIGEST_CHARS = int(os.getenv("RESUME_DIGEST_CHARS", "1500"))
+
+SECTION_ALIASES = {
+    "summary": ("summary", "professional summary", "profile", "objective", "about me", "about"),
+    "skills": ("skills", "technical skills", "core skills", "core competencies", "technologies",
+               "tech stack", "tools", "skills and tools", "skills & tools"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history"),
+    "projects": ("projects", "personal projects", "selected projects", "key projects", "side projects"),
+    "education": ("education", "academic background", "qualifications"),
+    "certifications": ("certifications", "certificates", "awards", "achievements", "honors"),
+}
+_HEADINGS = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})"
+DATE_RANGE = re.compile(rf"({_DATE})\s*(?:-|–|—|to)\s*({_DATE}|present|current|now)", re.IGNORECASE)
+_YEAR = re.compile(r"\d{4}")
+_BULLET = re.compile(r"^\s*(?:[•\-*▪◦●‣·]|o\s)\s*")
+_SKILL_SPLIT = re.compile(r"\s*[,;|•·]\s*")
+_HEADER_SPLIT = re.compile(r"\s+(?:at|@)\s+|\s*[|,–—]\s*|\s+-\s+")
+_METRIC = re.compile(r"\d")
+_PROJECT_SPLIT = re.compile(r":\s|\s[-–—]\s")
+_CONTACT = re.compile(r"@|https?://|www\.|github\.com|linkedin\.com|\+?\d[\d\s().-]{7,}")
+
+
+def _heading_section(text: str, is_heading: bool):
+    """
+    Returns the section a line opens, "other" for an unknown heading, or None.
+    """
+    key = text.strip().strip(":").strip().lower()
+    if key in _HEADINGS:
+        return _HEADINGS[key]
+    # Layout-less text (PDF, pasted resumes): short ALL CAPS lines are headings
+    if is_heading or (text.isupper() and len(key.split()) <= 4):
+        return "other"
+    return None
+
+
+def _split_header(text: str) -> list:
+    return [part for part in _HEADER_SPLIT.split(text.strip(" |,–—-")) if part]
+
+
+def _year(value: str) -> int:
+    if value.lower() in ("present", "current", "now"):
+        return 9999
+    match = _YEAR.search(value)
+    return int(match.group()) if match else 0
+
+
+def build_profile(lines: list) -> dict:
+    """
+    Groups (text, is_heading) lines into a profile dict:
+    summary, skills, roles, projects, education, certifications.
+    """
+    sections = {}
+    # Lines before the first heading: name, contact details, maybe a summary
+    current = "header"
+    for text, is_heading in lines:
+        text = " ".join(text.split())
+        if not text:
+            continue
+        section = _heading_section(text, is_heading)
+        if section is not None:
+            current = section
+            continue
+        sections.setdefault(current, []).append(text)
+
+    summary = sections.get("summary") or [line for line in sections.get("header", [])[1:] if not _CONTACT.search(line)]
+    profile = {
+        "summary": " ".join(summary[:3])[:400],
+        "skills": _parse_skills(sections.get("skills", [])),
+        "roles": _parse_roles(sections.get("experience", [])),
+        "projects": _parse_projects(sections.get("projects", [])),
+        "education": sections.get("education", [])[:3],
+        "certifications": [_BULLET.sub("", line) for line in sections.get("certifications", [])[:5]],
+    }
+    return profile
+
+
+def profile_from_text(text: str) -> dict:
+    """
+    Builds a profile from plain resume text (no layout information).
+    """
+    return build_profile([(line, False) for line in text.splitlines()])
+
+
+def _parse_skills(lines: list) -> list:
+    skills, seen = [], set()
+    for line in lines:
+        line = _BULLET.sub("", line)
+        # "Languages: Python, Go" -> drop the label
+        if ":" in line:
+            line = line.split(":", 1)[1]
+        for skill in _SKILL_SPLIT.split(line):
+            skill = skill.strip(" .")
+            if 1 < len(skill) <= 40 and skill.lower() not in seen:
+                seen.add(skill.lower())
+                skills.append(skill)
+    return skills
+
+
+def _parse_roles(lines: list) -> list:
+    roles, pending = [], []
+    for line in lines:
+        match = DATE_RANGE.search(line)
+        if match:
+            rest = (line[:match.start()] + " " + line[match.end():]).strip(" |,–—-()")
+            header = [part for text in pending + [rest] for part in _split_header(text)]
+            roles.append({
+                "title": header[0] if header else "",
+                "organization": header[1] if len(header) > 1 else "",
+                "start": match.group(1),
+                "end": match.group(2),
+                "highlights": [],
+            })
+            pending = []
+        elif _BULLET.match(line) and roles:
+            roles[-1]["highlights"].extend(pending)
+            roles[-1]["highlights"].append(_BULLET.sub("", line))
+            pending = []
+        else:
+            # Either the next role's title line or wrapped description text
+            pending.append(line)
+    if roles and pending:
+        roles[-1]["highlights"].extend(pending)
+    return roles
+
+
+def _parse_projects(lines: list) -> list:
+    projects = []
+    for line in lines:
+        if _BULLET.match(line) and projects:
+            projects[-1]["highlights"].append(_BULLET.sub("", line))
+            continue
+        line = _BULLET.sub("", line)
+        match = _PROJECT_SPLIT.search(line)
+        name, description = (line[:match.start()], line[match.end():]) if match else (line, "")
+        projects.append({"name": name.strip(), "highlights": [description.strip()] if description.strip() else []})
+    return projects
+
+
+def _highlight_score(text: str, skills: set) -> float:
+    # Concrete results (numbers, percentages) and named skills make better questions
+    score = 2.0 if _METRIC.search(text) else 0.0
+    score += sum(1 for word in re.findall(r"[\w+#.]+", text.lower()) if word in skills)
+    return score - len(text) / 400
+
+
+def resume_digest(profile: dict, max_chars: int = RESUME_DIGEST_CHARS) -> str:
+    """
+    Ranked, compact rendering of a profile: recent roles with their strongest
+    highlights, the skills mentioned most, then projects and education,
+    cut off at max_chars.
+    """
+    skills = profile.get("skills", [])
+    roles = sorted(profile.get("roles", []), key=lambda r: (_year(r["end"]), _year(r["start"])), reverse=True)
+    projects = profile.get("projects", [])
+
+    corpus = " ".join(h for item in roles + projects for h in item["highlights"]).lower()
+    # Skills backed by experience first, then in the candidate's own order
+    mentions = {s: len(re.findall(rf"(?<!\w){re.escape(s.lower())}(?!\w)", corpus)) for s in skills}
+    ranked_skills = sorted(skills, key=lambda s: (-mentions[s], skills.index(s)))
+    skill_words = {s.lower() for s in skills}
+
+    lines = []
+    if profile.get("summary"):
+        lines.append(f"Summary: {profile['summary']}")
+    if ranked_skills:
+        lines.append("Skills: " + ", ".join(ranked_skills[:15]))
+    for i, role in enumerate(roles):
+        heading = " at ".join(part for part in (role["title"], role["organization"]) if part)
+        lines.append(f"- {heading} ({role['start']} - {role['end']})")
+        if i < 3:
+            best = sorted(role["highlights"], key=lambda h: -_highlight_score(h, skill_words))[:3 - i]
+            lines.extend(f"    * {highlight}" for highlight in best)
+    for project in sorted(projects, key=lambda p: -max([_highlight_score(h, skill_words) for h in p["highlights"]] or [0]))[:3]:
+        best = max(project["highlights"], key=lambda h: _highlight_score(h, skill_words), default="")
+        lines.append(f"- Project: {project['name']}" + (f": {best}" if best else ""))
+    for education in profile.get("education", [])[:2]:
+        lines.append(f"- Education: {education}")
+
+    digest, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > max_chars:
+            break
+        digest.append(line)
+        used += len(line) + 1
+    return "\n".join(digest)
+
+
+def is_empty(profile: dict) -> bool:
+    return not (profile.get("skills") or profile.get("roles") or profile.get("projects"))
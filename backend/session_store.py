@@ -0,0 +1,366 @@
+"""
+Session storage.
+
+Sessions are a metadata dict plus a SessionTranscript under "transcript".
+Messages are stored as an append-only log; metadata updates only touch the
+fields that changed.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import nullcontext
+
+from .transcript import transcript_for_session
+
+# Metadata kept on the transcript rather than the session dict
+TRANSCRIPT_FIELDS = ("summary", "summarized_upto")
+# Seconds a worker may hold a session's turn guard before others may take it over
+TURN_LEASE = 300.0
+TURN_POLL_INTERVAL = 0.05
+
+
+def _snapshot(session: dict) -> dict:
+    data = {key: value for key, value in session.items() if key != "transcript"}
+    transcript = session.get("transcript")
+    if transcript is not None:
+        for field in TRANSCRIPT_FIELDS:
+            data[field] = getattr(transcript, field)
+    return data
+
+
+def _restore(data: dict, messages) -> dict:
+    transcript_fields = {field: data.pop(field) for field in TRANSCRIPT_FIELDS if field in data}
+    transcript = transcript_for_session(data)
+    for role, content in messages:
+        transcript.append(role, content)
+    for field, value in transcript_fields.items():
+        setattr(transcript, field, value)
+    data["transcript"] = transcript
+    return data
+
+
+class SessionStore:
+    """
+    Interface for session storage backends.
+    """
+
+    def create(self, session_id: str, session: dict):
+        raise NotImplementedError
+
+    def get(self, session_id: str):
+        """
+        Returns the session dict, or None if it does not exist or has expired.
+        """
+        raise NotImplementedError
+
+    def append_message(self, session_id: str, session: dict, role: str, content: str):
+        """
+        Appends a message to the session's transcript and persists it.
+        """
+        raise NotImplementedError
+
+    def update(self, session_id: str, session: dict, fields):
+        """
+        Persists the named metadata fields of session.
+        """
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    # Coroutine forms for use on the event loop. Backends that block on I/O
+    # run the call in a thread; the in-memory store answers inline.
+
+    async def get_async(self, session_id: str):
+        return self.get(session_id)
+
+    async def create_async(self, session_id: str, session: dict):
+        self.create(session_id, session)
+
+    async def append_message_async(self, session_id: str, session: dict, role: str, content: str):
+        self.append_message(session_id, session, role, content)
+
+    async def update_async(self, session_id: str, session: dict, fields):
+        self.update(session_id, session, fields)
+
+    def turn_guard(self, session_id: str):
+        """
+        Async context manager that serialises a session's turns across
+        processes. A single-process store needs nothing beyond the caller's
+        asyncio.Lock.
+        """
+        return nullcontext()
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local store with LRU eviction and an idle TTL.
+
+    on_evict(session_id, session) is called for sessions dropped by either limit.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 7200.0, on_evict=None, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, session_id: str):
+        _, session = self._sessions.pop(session_id)
+        if self.on_evict is not None:
+            self.on_evict(session_id, session)
+
+    def _sweep(self, now: float):
+        # Least recently used first, so stop at the first live session
+        while self._sessions:
+            session_id, (last_access, _) = next(iter(self._sessions.items()))
+            if now - last_access < self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            self._evict(session_id)
+
+    def create(self, session_id: str, session: dict):
+        with self._lock:
+            now = self.clock()
+            self._sessions[session_id] = (now, session)
+            self._sweep(now)
+
+    def get(self, session_id: str):
+        with self._lock:
+            now = self.clock()
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if now - entry[0] >= self.ttl:
+                self._evict(session_id)
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def append_message(self, session_id: str, session: dict, role: str, content: str):
+        session["transcript"].append(role, content)
+
+    def update(self, session_id: str, session: dict, fields):
+        # The dict is the stored object, so changes are already visible
+        pass
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed store (WAL mode) shared by every worker on the host.
+
+    Each get() rebuilds the session from the database, so any worker can
+    serve any turn; turn_guard() keeps two workers from running turns of the
+    same session at once. The *_async methods run queries in a thread so a
+    busy database never stalls the event loop.
+    """
+
+    def __init__(self, path: str = "sessions.db", ttl: float = 7200.0, sweep_every: int = 100, clock=time.time):
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self.clock = clock
+        self._creates = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turn_guards ("
+            "session_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def create(self, session_id: str, session: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(_snapshot(session)), self.clock()),
+            )
+            self._creates += 1
+            if self._creates % self.sweep_every == 0:
+                self._sweep()
+
+    def _sweep(self):
+        cutoff = self.clock() - self.ttl
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id IN (SELECT id FROM sessions WHERE updated_at < ?)", (cutoff,)
+            )
+            self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM turn_guards WHERE expires_at < ?", (self.clock(),))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def get(self, session_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or self.clock() - row[1] >= self.ttl:
+                return None
+            messages = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return _restore(json.loads(row[0]), messages)
+
+    def append_message(self, session_id: str, session: dict, role: str, content: str):
+        session["transcript"].append(role, content)
+        self._insert_message(session_id, role, content)
+
+    def _insert_message(self, session_id: str, role: str, content: str):
+        with self._lock:
+            # seq comes from the database, not this worker's copy of the transcript,
+            # so appends from different workers never collide
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO messages (session_id, seq, role, content) "
+                    "SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ? FROM messages WHERE session_id = ?",
+                    (session_id, role, content, session_id),
+                )
+                self._conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (self.clock(), session_id))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def update(self, session_id: str, session: dict, fields):
+        snapshot = _snapshot(session)
+        self._write_fields(session_id, {field: snapshot[field] for field in fields})
+
+    def _write_fields(self, session_id: str, changes: dict):
+        with self._lock:
+            # Merge only these fields so concurrent writers of other fields are not clobbered
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is not None:
+                    data = json.loads(row[0])
+                    data.update(changes)
+                    self._conn.execute(
+                        "UPDATE sessions SET data = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(data), self.clock(), session_id),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    async def get_async(self, session_id: str):
+        return await asyncio.to_thread(self.get, session_id)
+
+    async def create_async(self, session_id: str, session: dict):
+        await asyncio.to_thread(self.create, session_id, session)
+
+    async def append_message_async(self, session_id: str, session: dict, role: str, content: str):
+        # The transcript is only touched on the loop; the thread just writes the row
+        session["transcript"].append(role, content)
+        await asyncio.to_thread(self._insert_message, session_id, role, content)
+
+    async def update_async(self, session_id: str, session: dict, fields):
+        snapshot = _snapshot(session)
+        await asyncio.to_thread(self._write_fields, session_id, {field: snapshot[field] for field in fields})
+
+    def turn_guard(self, session_id: str):
+        return _TurnGuard(self, session_id)
+
+    def _claim_turn(self, session_id: str, owner: str) -> bool:
+        now = self.clock()
+        with self._lock:
+            # Takes the guard if it is free or its holder's lease ran out
+            cursor = self._conn.execute(
+                "INSERT INTO turn_guards (session_id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE turn_guards.expires_at < ?",
+                (session_id, owner, now + TURN_LEASE, now),
+            )
+            return cursor.rowcount == 1
+
+    def _release_turn(self, session_id: str, owner: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM turn_guards WHERE session_id = ? AND owner = ?", (session_id, owner))
+
+
+class _TurnGuard:
+    """
+    A row in turn_guards, polled for until free; expires after TURN_LEASE
+    so a crashed worker can't block the session forever.
+    """
+
+    def __init__(self, store: SQLiteSessionStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self.owner = uuid.uuid4().hex
+
+    async def __aenter__(self):
+        claim = None
+        try:
+            while True:
+                claim = asyncio.ensure_future(asyncio.to_thread(self.store._claim_turn, self.session_id, self.owner))
+                if await asyncio.shield(claim):
+                    return
+                await asyncio.sleep(TURN_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            # The claim may still go through in its thread; release after it
+            await asyncio.shield(self._release(after=claim))
+            raise
+
+    async def __aexit__(self, *exc):
+        await asyncio.shield(self._release())
+        return False
+
+    async def _release(self, after=None):
+        # Shielded by callers, so a cancelled turn still frees the row, and
+        # in a thread, so the SQLite write never blocks the event loop
+        if after is not None:
+            await asyncio.wait({after})
+        await asyncio.to_thread(self.store._release_turn, self.session_id, self.owner)
+
+
+def create_session_store(on_evict=None) -> SessionStore:
+    """
+    Builds the store selected by SESSION_STORE ("memory" or "sqlite").
+    """
+    ttl = float(os.getenv("SESSION_TTL", "7200"))
+    if os.getenv("SESSION_STORE", "memory") == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "sessions.db"), ttl=ttl)
+    return InMemorySessionStore(int(os.getenv("SESSION_MAX", "10000")), ttl=ttl, on_evict=on_evict)
@@ -0,0 +1,164 @@
+"""
+Speculative drafting of the next interviewer question.
+
+While the candidate is still answering, the client sends the interim
+transcript. A draft of the next question is generated from it in the
+background; when the final answer arrives and still matches what the draft
+was built from (same history, same persona, nearly the same words), the
+draft is used instead of starting the LLM call from scratch.
+"""
+import asyncio
+import difflib
+import os
+import time
+
+SPECULATIVE_DRAFTS = os.getenv("SPECULATIVE_DRAFTS", "1") == "1"
+# Word-level similarity between the drafted-from partial and the final answer
+DRAFT_MIN_SIMILARITY = float(os.getenv("DRAFT_MIN_SIMILARITY", "0.9"))
+# Don't restart a draft more often than this while the partial keeps changing
+DRAFT_MIN_INTERVAL = float(os.getenv("DRAFT_MIN_INTERVAL", "1.5"))
+# Drafts started per answer; each one spends a request from the key budget
+DRAFT_MAX_PER_TURN = int(os.getenv("DRAFT_MAX_PER_TURN", "3"))
+# Only draft while some key has used less than this share of its RPM budget
+DRAFT_MAX_KEY_LOAD = float(os.getenv("DRAFT_MAX_KEY_LOAD", "0.5"))
+DRAFT_MAX_AGE = 120.0
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a.lower().split(), b.lower().split(), autojunk=False).ratio()
+
+
+def extends(a: str, b: str, min_similarity: float) -> bool:
+    """
+    Whether b is a continuation of a: its first words (nearly) match all of a.
+    """
+    words = a.split()
+    return similarity(a, " ".join(b.split()[:len(words)])) >= min_similarity
+
+
+class Draft:
+    def __init__(self, partial_text: str, base_length: int, persona: str, task: asyncio.Task, clock, number: int = 1):
+        self.partial_text = partial_text
+        self.base_length = base_length
+        self.persona = persona
+        self.task = task
+        # How many drafts this answer has had, this one included
+        self.number = number
+        self.started_at = clock()
+        self.finished_at = None
+        self.saved = 0.0
+        self._clock = clock
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self.finished_at = self._clock()
+        # Retrieve any exception so a discarded failed draft doesn't log a warning
+        if not task.cancelled():
+            task.exception()
+
+    def head_start(self, now: float) -> float:
+        """
+        How long the draft had been generating by now: the latency a hit saves.
+        """
+        end = now if self.finished_at is None else min(self.finished_at, now)
+        return end - self.started_at
+
+
+class DraftManager:
+    """
+    At most one draft per session, plus hit/miss accounting.
+    """
+
+    def __init__(self, generate, reject=(), min_similarity: float = DRAFT_MIN_SIMILARITY,
+                 min_interval: float = DRAFT_MIN_INTERVAL, max_per_turn: int = DRAFT_MAX_PER_TURN,
+                 max_age: float = DRAFT_MAX_AGE, clock=time.monotonic):
+        self.generate = generate
+        # Results that must never be served (e.g. rate-limit apologies)
+        self.reject = set(reject)
+        self.min_similarity = min_similarity
+        self.min_interval = min_interval
+        self.max_per_turn = max_per_turn
+        self.max_age = max_age
+        self.clock = clock
+        self._drafts = {}
+        self.counters = {"started": 0, "hits": 0, "misses": 0, "cancelled": 0}
+        self.saved_seconds = 0.0
+
+    def propose(self, session_id: str, partial_text: str, base_length: int, persona: str, llm_request: dict) -> bool:
+        """
+        Starts drafting from a partial answer unless the current draft already
+        covers it, is still generating from an earlier part of the same
+        answer, was started too recently to replace, or the answer has had
+        max_per_turn drafts already. Returns whether a new draft was started.
+        """
+        number = 1
+        current = self._drafts.get(session_id)
+        if current is not None and current.base_length == base_length:
+            if similarity(current.partial_text, partial_text) >= self.min_similarity:
+                return False
+            if not current.task.done() and extends(current.partial_text, partial_text, self.min_similarity):
+                return False
+            if self.clock() - current.started_at < self.min_interval or current.number >= self.max_per_turn:
+                return False
+            number = current.number + 1
+        self.discard(session_id)
+
+        task = asyncio.create_task(self.generate(**llm_request))
+        self._drafts[session_id] = Draft(partial_text, base_length, persona, task, self.clock, number)
+        self.counters["started"] += 1
+        return True
+
+    def claim(self, session_id: str, final_text: str, base_length: int, persona: str):
+        """
+        Returns the draft if it still fits the final answer (the caller awaits
+        draft.task), otherwise discards it and returns None.
+        """
+        draft = self._drafts.pop(session_id, None)
+        if draft is None:
+            return None
+        now = self.clock()
+        fits = (
+            draft.base_length == base_length
+            and draft.persona == persona
+            and now - draft.started_at <= self.max_age
+            and not (draft.task.done() and (draft.task.cancelled() or draft.task.exception() is not None))
+            and similarity(draft.partial_text, final_text) >= self.min_similarity
+        )
+        if not fits:
+            draft.task.cancel()
+            self.counters["misses"] += 1
+            return None
+        draft.saved = draft.head_start(now)
+        return draft
+
+    async def result(self, draft: Draft):
+        """
+        Awaits a claimed draft. Returns its text, or None (counted as a miss)
+        if generation failed, so the caller generates normally.
+        """
+        try:
+            text = await draft.task
+        except Exception:
+            text = None
+        if not text or text in self.reject:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        self.saved_seconds += draft.saved
+        return text
+
+    def discard(self, session_id: str):
+        draft = self._drafts.pop(session_id, None)
+        if draft is not None and not draft.task.done():
+            draft.task.cancel()
+            self.counters["cancelled"] += 1
+
+    def stats(self) -> dict:
+        decided = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "in_flight": sum(1 for d in self._drafts.values() if not d.task.done()),
+            "hit_rate": round(self.counters["hits"] / decided, 3) if decided else 0.0,
+            "saved_ms_total": round(self.saved_seconds * 1000, 1),
+            "saved_ms_avg": round(self.saved_seconds * 1000 / self.counters["hits"], 1) if self.counters["hits"] else 0.0,
+        }
@@ -0,0 +1,41 @@
+"""
+Helpers for streaming interviewer replies sentence by sentence.
+"""
+import re
+
+# A sentence ends at . ! or ? (optionally followed by closing quotes/brackets) and whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+
+def split_sentences(text: str) -> list:
+    """
+    Splits text into sentences, keeping punctuation and closing quotes
+    attached; the same sentences SentenceBuffer releases when streamed.
+    """
+    buffer = SentenceBuffer()
+    return buffer.feed(text) + buffer.flush()
+
+
+class SentenceBuffer:
+    """
+    Accumulates streamed text chunks and releases complete sentences.
+    """
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, chunk: str) -> list:
+        self._pending += chunk
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._pending):
+            sentence = self._pending[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self._pending = self._pending[start:]
+        return sentences
+
+    def flush(self) -> list:
+        remainder, self._pending = self._pending.strip(), ""
+        return [remainder] if remainder else []
@@ -0,0 +1,111 @@
+"""
+Incremental speech-to-text for a live audio stream.
+
+Audio arrives as 16 kHz mono PCM16 frames while the candidate speaks.
+Partial transcripts are produced by re-decoding the recent window every
+PARTIAL_INTERVAL seconds; long answers are committed in chunks so no
+decode ever covers more than COMMIT_SECONDS of audio. When the endpointer
+sees enough trailing silence the utterance is finalised, and only the
+uncommitted tail still needs decoding.
+"""
+import os
+
+import numpy as np
+
+from .audio_utils import SAMPLE_RATE, EnergyEndpointer, pcm16_to_float, preprocess_audio
+
+PARTIAL_INTERVAL = float(os.getenv("ASR_PARTIAL_INTERVAL", "1.0"))
+END_SILENCE_MS = int(os.getenv("ASR_END_SILENCE_MS", "700"))
+# Whisper sees at most 30 s; commit earlier audio before the window fills
+COMMIT_SECONDS = float(os.getenv("ASR_COMMIT_SECONDS", "20"))
+
+
+class StreamingTranscriber:
+    """
+    Buffers one utterance and turns it into partial and final transcripts.
+
+    transcribe is an async callable taking float32 samples and returning text.
+    """
+
+    def __init__(self, transcribe, sample_rate: int = SAMPLE_RATE):
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.endpointer = EnergyEndpointer(sample_rate, end_silence_ms=END_SILENCE_MS)
+        self.reset()
+
+    def reset(self):
+        self._chunks = []
+        self._pending_samples = 0
+        self._committed = []
+        self._since_partial = 0
+        self._odd_byte = b""
+        self.endpointer.reset()
+
+    def feed(self, pcm: bytes) -> bool:
+        """
+        Adds PCM16 bytes; returns True when the utterance has ended.
+        """
+        pcm = self._odd_byte + pcm
+        if len(pcm) % 2:
+            pcm, self._odd_byte = pcm[:-1], pcm[-1:]
+        else:
+            self._odd_byte = b""
+        samples = pcm16_to_float(pcm)
+        self._chunks.append(samples)
+        self._pending_samples += len(samples)
+        self._since_partial += len(samples)
+        return self.endpointer.push(samples)
+
+    @property
+    def has_speech(self) -> bool:
+        return self.endpointer.in_speech
+
+    def _pending_audio(self) -> np.ndarray:
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    async def _transcribe(self, audio: np.ndarray) -> str:
+        # Silence before, between and after phrases only costs decode time
+        audio = preprocess_audio(audio, self.sample_rate)
+        return await self.transcribe(audio) if len(audio) else ""
+
+    async def _commit_if_long(self):
+        if self._pending_samples < COMMIT_SECONDS * self.sample_rate:
+            return
+        audio = self._pending_audio()
+        # Cut at the quietest 30 ms frame in the last quarter so words are not split
+        frame = self.sample_rate * 30 // 1000
+        search_start = int(len(audio) * 0.75) // frame * frame
+        tail = audio[search_start:len(audio) - len(audio) % frame].reshape(-1, frame)
+        cut = search_start + int(np.argmin(np.sqrt(np.mean(tail ** 2, axis=1)))) * frame if len(tail) else len(audio)
+        text = await self._transcribe(audio[:cut])
+        if text:
+            self._committed.append(text)
+        # Frames fed while decoding were appended after audio; keep them
+        self._chunks[0] = audio[cut:]
+        self._pending_samples -= cut
+
+    async def partial(self):
+        """
+        Returns an updated partial transcript if enough new audio has arrived
+        since the last one, otherwise None.
+        """
+        if not self.has_speech or self._since_partial < PARTIAL_INTERVAL * self.sample_rate:
+            return None
+        self._since_partial = 0
+        await self._commit_if_long()
+        tail = await self._transcribe(self._pending_audio())
+        return " ".join(self._committed + ([tail] if tail else []))
+
+    async def finalize(self) -> str:
+        """
+        Decodes what is left of the utterance, returns the full text and resets.
+        """
+        text = ""
+        if self.has_speech:
+            await self._commit_if_long()
+            tail = await self._transcribe(self._pending_audio())
+            text = " ".join(self._committed + ([tail] if tail else []))
+        self.reset()
+        return text.strip()
@@ -0,0 +1,147 @@
+"""
+Per-session conversation transcript with incrementally rendered history
+and a cached system prompt.
+"""
+import hashlib
+import io
+from collections import deque
+
+from . import resume_profile
+from .persona_logic import HISTORY_WINDOW
+from .prompts import SYSTEM_PROMPT_TEMPLATE
+
+_QUESTION_NUM_MARKER = "\x00question_num\x00"
+# Stand-in for the counter in the cacheable prompt; the real one goes in the turn context
+_CACHED_QUESTION_NUM = "N (see TURN CONTEXT)"
+
+
+class SessionTranscript:
+    """
+    Keeps the message list and its "role: content" rendering in sync as
+    messages are appended, so each turn only pays for the new message.
+
+    The system prompt is rendered once per session around the question counter;
+    only the counter and the persona section change between turns.
+    """
+
+    def __init__(self, role: str, experience_level: str, max_questions: int, resume_text: str = ""):
+        self.messages = []
+        self._buffer = io.StringIO()
+        self._rendered = ""
+        self._dirty = False
+        # Start offset of each message's line in the rendered buffer
+        self._offsets = []
+        self._length = 0
+
+        # (role, word_count) of the latest messages, for persona detection
+        self.recent_word_counts = deque(maxlen=HISTORY_WINDOW)
+
+        # Running summary of messages[:summarized_upto], maintained by context_builder
+        self.summary = ""
+        self.summarized_upto = 0
+
+        static_prompt = SYSTEM_PROMPT_TEMPLATE.format(
+            role=role,
+            experience_level=experience_level,
+            current_question_num=_QUESTION_NUM_MARKER,
+            max_questions=max_questions,
+        )
+        self._prompt_head, self._prompt_tail = static_prompt.split(_QUESTION_NUM_MARKER, 1)
+        self._resume_part = f"\nCandidate Resume:\n{resume_text}\n" if resume_text else ""
+        self._persona_parts = {}
+        self._max_questions = max_questions
+
+        # Identical static prompts (same role, level and no resume) share one
+        # cached-content handle; a resume makes the handle session-scoped
+        self.cached_instruction = self._prompt_head + _CACHED_QUESTION_NUM + self._prompt_tail + self._resume_part
+        self.cache_key = "ctx-" + hashlib.sha256(self.cached_instruction.encode("utf-8")).hexdigest()[:32]
+        self.session_scoped_cache = bool(resume_text)
+
+    def append(self, role: str, content: str):
+        line = f"{role}: {content}"
+        if self.messages:
+            self._buffer.write("\n")
+            self._length += 1
+        self._offsets.append(self._length)
+        self._buffer.write(line)
+        self._length += len(line)
+        self.messages.append({"role": role, "content": content})
+        self.recent_word_counts.append((role, len(content.split())))
+        self._dirty = True
+
+    def render(self) -> str:
+        """
+        Returns the history as "role: content" lines joined by newlines.
+        """
+        if self._dirty:
+            self._rendered = self._buffer.getvalue()
+            self._dirty = False
+        return self._rendered
+
+    def render_range(self, start: int, end: int = None) -> str:
+        """
+        Renders messages[start:end] without re-joining them.
+        """
+        if start >= len(self.messages) or (end is not None and end <= start):
+            return ""
+        rendered = self.render()
+        if end is None or end >= len(self.messages):
+            return rendered[self._offsets[start]:]
+        return rendered[self._offsets[start]:self._offsets[end] - 1]
+
+    def chars_from(self, start: int) -> int:
+        """
+        Length of render_range(start) without building the string.
+        """
+        if start >= len(self.messages):
+            return 0
+        return self._length - self._offsets[start]
+
+    def system_instruction(self, question_num: int, persona: str = None, persona_instruction: str = None) -> str:
+        instruction = self._prompt_head + str(question_num) + self._prompt_tail + self._resume_part
+        if persona is None:
+            return instruction
+
+        return instruction + self._persona_part(persona, persona_instruction)
+
+    def turn_context(self, question_num: int, persona: str = None, persona_instruction: str = None) -> str:
+        """
+        Per-turn header prepended to the prompt when the system prompt is
+        served from the context cache.
+        """
+        context = f"TURN CONTEXT:\nCurrent Progress: Question {question_num} of {self._max_questions}."
+        if persona is not None:
+            context += self._persona_part(persona, persona_instruction)
+        return context + "\n\n"
+
+    def _persona_part(self, persona: str, persona_instruction: str) -> str:
+        persona_part = self._persona_parts.get(persona)
+        if persona_part is None:
+            persona_part = self._persona_parts[persona] = f"\n\nDETECTED PERSONA: {persona.upper()}\n{persona_instruction}"
+        return persona_part
+
+    def __len__(self):
+        return len(self.messages)
+
+
+def resume_context(session: dict) -> str:
+    """
+    Resume text for the prompt: the ranked digest of the stored profile,
+    falling back to the raw text when nothing could be structured.
+    """
+    profile = session.get("resume_profile")
+    if profile and not resume_profile.is_empty(profile):
+        return resume_profile.resume_digest(profile)
+    return session.get("resume_text", "")
+
+
+def transcript_for_session(session: dict) -> SessionTranscript:
+    """
+    Builds an empty transcript for a session's role, level and resume.
+    """
+    return SessionTranscript(
+        session["role"],
+        session["experience_level"],
+        session["max_questions"],
+        resume_context(session),
+    )
@@ -0,0 +1,256 @@
+"""
+Text-to-speech backends with a content-addressed cache.
+
+Backends:
+- piper:  local neural voices (`pip install piper-tts`, TTS_PIPER_MODEL=voice.onnx)
+- espeak: local espeak-ng / espeak binary, very fast, robotic voice
+- gtts:   Google Translate TTS, needs network access
+
+TTS_BACKEND=auto (default) picks piper if a voice model is configured, then
+espeak if installed, then gTTS. Replies are synthesised sentence by sentence
+so playback can start after the first one, and repeated phrases (greetings,
+the end-of-interview message, transitions) come from the cache.
+"""
+import hashlib
+import io
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from collections import OrderedDict
+
+from .streaming import split_sentences
+
+logger = logging.getLogger(__name__)
+
+TTS_BACKEND = os.getenv("TTS_BACKEND", "auto")
+TTS_PIPER_MODEL = os.getenv("TTS_PIPER_MODEL", "")
+TTS_ESPEAK_VOICE = os.getenv("TTS_ESPEAK_VOICE", "en-us")
+TTS_ESPEAK_RATE = int(os.getenv("TTS_ESPEAK_RATE", "165"))
+TTS_CACHE_MB = float(os.getenv("TTS_CACHE_MB", "64"))
+
+
+class TTSBackend:
+    """
+    Interface: synthesize() turns one piece of text into a complete audio file.
+    """
+    name = "base"
+    media_type = "application/octet-stream"
+
+    def synthesize(self, text: str) -> bytes:
+        raise NotImplementedError
+
+    def cache_namespace(self) -> str:
+        # Anything that changes the audio for the same text belongs here
+        return self.name
+
+    def join(self, clips: list) -> bytes:
+        """
+        Combines per-sentence clips into one audio file of media_type.
+        """
+        if len(clips) == 1:
+            return clips[0]
+        if self.media_type == "audio/wav":
+            return _join_wav(clips)
+        # MP3 frames can simply be concatenated
+        return b"".join(clips)
+
+
+def _join_wav(clips: list) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        for i, clip in enumerate(clips):
+            with wave.open(io.BytesIO(clip), "rb") as wav_file:
+                if i == 0:
+                    out.setparams(wav_file.getparams())
+                out.writeframes(wav_file.readframes(wav_file.getnframes()))
+    return buffer.getvalue()
+
+
+class PiperBackend(TTSBackend):
+    name = "piper"
+    media_type = "audio/wav"
+
+    def __init__(self, model_path: str):
+        try:
+            from piper.voice import PiperVoice
+        except ImportError:
+            raise RuntimeError("TTS_BACKEND=piper requires `pip install piper-tts`")
+        self.model_path = model_path
+        self.voice = PiperVoice.load(model_path)
+        # The ONNX session is not safe to share between audio worker threads
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str) -> bytes:
+        buffer = io.BytesIO()
+        with self._lock, wave.open(buffer, "wb") as wav_file:
+            if hasattr(self.voice, "synthesize_wav"):
+                self.voice.synthesize_wav(text, wav_file)
+            else:
+                self.voice.synthesize(text, wav_file)
+        return buffer.getvalue()
+
+    def cache_namespace(self) -> str:
+        return f"piper:{os.path.basename(self.model_path)}"
+
+
+class EspeakBackend(TTSBackend):
+    name = "espeak"
+    media_type = "audio/wav"
+
+    def __init__(self, voice: str = TTS_ESPEAK_VOICE, rate: int = TTS_ESPEAK_RATE):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        if self.binary is None:
+            raise RuntimeError("TTS_BACKEND=espeak requires espeak-ng (or espeak) on the PATH")
+        self.voice = voice
+        self.rate = rate
+
+    def synthesize(self, text: str) -> bytes:
+        cmd = [self.binary, "-v", self.voice, "-s", str(self.rate), "--stdout", text]
+        return subprocess.run(cmd, capture_output=True, check=True).stdout
+
+    def cache_namespace(self) -> str:
+        return f"espeak:{self.voice}:{self.rate}"
+
+
+class GTTSBackend(TTSBackend):
+    name = "gtts"
+    media_type = "audio/mpeg"
+
+    def synthesize(self, text: str) -> bytes:
+        from gtts import gTTS
+        buffer = io.BytesIO()
+        gTTS(text=text, lang='en').write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+def create_backend(name: str = None) -> TTSBackend:
+    name = name or TTS_BACKEND
+    if name == "piper":
+        return PiperBackend(TTS_PIPER_MODEL)
+    if name == "espeak":
+        return EspeakBackend()
+    if name == "gtts":
+        return GTTSBackend()
+    if name != "auto":
+        raise ValueError(f"Unknown TTS_BACKEND '{name}' (expected piper, espeak, gtts or auto)")
+
+    if TTS_PIPER_MODEL:
+        try:
+            return PiperBackend(TTS_PIPER_MODEL)
+        except Exception as e:
+            logger.warning("Piper unavailable, trying espeak: %s", e)
+    try:
+        return EspeakBackend()
+    except RuntimeError:
+        return GTTSBackend()
+
+
+class SpeechCache:
+    """
+    Thread-safe LRU of synthesised audio keyed by a hash of the backend
+    configuration and the text, bounded by total bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(namespace: str, text: str) -> str:
+        return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = audio
+            self._size += len(audio)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+cache = SpeechCache(int(TTS_CACHE_MB * 1024 * 1024))
+
+def get_backend() -> TTSBackend:
+    """
+    Returns the process-wide TTS backend, created on first use.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+                logger.info("TTS backend: %s", _backend.name)
+    return _backend
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+def synthesize(text: str) -> bytes:
+    """
+    Synthesises text (or returns the cached audio for it). Blocking; call
+    from the audio executor.
+    """
+    backend = get_backend()
+    text = _normalize(text)
+    key = SpeechCache.key(backend.cache_namespace(), text)
+    audio = cache.get(key)
+    if audio is None:
+        audio = backend.synthesize(text)
+        cache.put(key, audio)
+    return audio
+
+def synthesize_sentences(text: str):
+    """
+    Yields (sentence, audio) one sentence at a time, so the first one can be
+    sent to the client while the rest are still being synthesised.
+    """
+    for sentence in split_sentences(text):
+        yield sentence, synthesize(sentence)
+
+def synthesize_reply(text: str) -> bytes:
+    """
+    Synthesises a whole reply as one audio file, built from the same cached
+    per-sentence clips that synthesize_sentences() streams.
+    """
+    clips = [audio for _, audio in synthesize_sentences(text)]
+    if not clips:
+        return synthesize(text)
+    return get_backend().join(clips)
+
+def warm_cache(phrases: list):
+    """
+    Pre-synthesises fixed phrases sentence by sentence, as they will be requested.
+    """
+    for phrase in phrases:
+        try:
+            for _ in synthesize_sentences(phrase):
+                pass
+        except Exception as e:
+            logger.warning("Error warming TTS cache: %s", e)
@@ -0,0 +1,52 @@
+"""
+Prompt tokens per turn: full history vs the budgeted context builder.
+
+The background summary is simulated with a fixed-size summary so no LLM is
+needed; it is applied as soon as schedule_summary would have started it.
+
+Usage:  python -m benchmarks.context_budget --questions 15 --words 120
+"""
+import argparse
+
+from backend import context_builder
+from backend.llm_client import estimate_tokens
+from backend.prompts import NEXT_QUESTION_PROMPT
+from backend.transcript import SessionTranscript
+
+FAKE_SUMMARY = "- Covered: background, a Python project, caching strategy\n" * 6
+
+
+def run(questions, words):
+    answer = " ".join(["detail"] * words)
+    question = "Thanks for sharing that. Can you walk me through how you would scale it?"
+    transcript = SessionTranscript("Backend Developer", "Senior", questions)
+    transcript.append("model", question)
+
+    rows = []
+    for n in range(1, questions):
+        transcript.append("user", answer)
+        full = estimate_tokens(NEXT_QUESTION_PROMPT.format(conversation_history=transcript.render()))
+        budgeted = estimate_tokens(NEXT_QUESTION_PROMPT.format(conversation_history=context_builder.build_history(transcript)))
+        rows.append((n, full, budgeted))
+        transcript.append("model", question)
+
+        upto = len(transcript) - context_builder.RECENT_MESSAGES
+        if upto - transcript.summarized_upto >= context_builder.SUMMARY_BATCH:
+            transcript.summary = FAKE_SUMMARY
+            transcript.summarized_upto = upto
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=15)
+    parser.add_argument("--words", type=int, default=120)
+    args = parser.parse_args()
+
+    rows = run(args.questions, args.words)
+    print(f"{'turn':>4} {'full':>8} {'budgeted':>9}")
+    for n, full, budgeted in rows:
+        print(f"{n:>4} {full:>8} {budgeted:>9}")
+    total_full = sum(r[1] for r in rows)
+    total_budgeted = sum(r[2] for r in rows)
+    print(f"total history prompt tokens: {total_full} -> {total_budgeted} ({100 * (1 - total_budgeted / total_full):.0f}% fewer)")
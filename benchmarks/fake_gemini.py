@@ -0,0 +1,99 @@
+"""
+Minimal local stand-in for the Gemini REST API, used by the benchmarks and tests.
+
+Run standalone with:  python -m benchmarks.fake_gemini --port 8765 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_REPLY = "Thanks for sharing that. Can you walk me through a project you are proud of?"
+# Smallest content the real API accepts for caching
+MIN_CACHE_TOKENS = 4096
+
+
+def create_app(latency: float = 0.5, jitter: float = 0.1, min_cache_tokens: int = MIN_CACHE_TOKENS) -> FastAPI:
+    app = FastAPI(title="Fake Gemini")
+    app.state.requests = 0
+    app.state.bodies = []
+    app.state.cached_contents = {}
+    app.state.cache_creates = 0
+
+    @app.post("/v1beta/cachedContents")
+    async def create_cached_content(request: Request):
+        body = await request.json()
+        text = body["systemInstruction"]["parts"][0]["text"]
+        if len(text) // 4 < min_cache_tokens:
+            return JSONResponse(
+                {"error": {"code": 400, "status": "INVALID_ARGUMENT", "message": "Cached content is too small."}},
+                status_code=400,
+            )
+        app.state.cache_creates += 1
+        name = f"cachedContents/fake-{app.state.cache_creates}"
+        app.state.cached_contents[name] = body
+        return JSONResponse({"name": name, "model": body["model"]})
+
+    @app.delete("/v1beta/cachedContents/{cache_id}")
+    async def delete_cached_content(cache_id: str):
+        app.state.cached_contents.pop(f"cachedContents/{cache_id}", None)
+        return JSONResponse({})
+
+    @app.post("/v1beta/models/{model_action}")
+    async def generate(model_action: str, request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        app.state.bodies.append(body)
+        if body.get("cachedContent") and body["cachedContent"] not in app.state.cached_contents:
+            return JSONResponse(
+                {"error": {"code": 403, "status": "PERMISSION_DENIED", "message": "CachedContent not found."}},
+                status_code=403,
+            )
+        if model_action.endswith(":streamGenerateContent"):
+            return StreamingResponse(stream_reply(latency, jitter), media_type="text/event-stream")
+        await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+        return JSONResponse({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": FAKE_REPLY}]}}],
+            "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": 20},
+        })
+
+    return app
+
+
+async def stream_reply(latency: float, jitter: float):
+    # First token after a fraction of the latency, the rest spread over the remainder
+    words = FAKE_REPLY.split(" ")
+    await asyncio.sleep(max(0.0, random.gauss(latency * 0.2, jitter)))
+    for i, word in enumerate(words):
+        chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": word + " "}]}}]}
+        yield f"data: {json.dumps(chunk)}\r\n\r\n"
+        if i < len(words) - 1:
+            await asyncio.sleep(latency * 0.8 / len(words))
+
+
+def serve_in_thread(port: int, latency: float = 0.5, jitter: float = 0.1, min_cache_tokens: int = MIN_CACHE_TOKENS) -> uvicorn.Server:
+    """
+    Starts the fake server on a daemon thread and waits until it accepts requests.
+    The app is reachable as server.config.app for inspecting recorded state.
+    """
+    config = uvicorn.Config(create_app(latency, jitter, min_cache_tokens), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.jitter), host="127.0.0.1", port=args.port)
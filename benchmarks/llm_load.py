@@ -0,0 +1,77 @@
+"""
+Load benchmark: sync generate_response (run through the threadpool the way
+FastAPI runs `def` handlers) vs generate_response_async, both against a local
+fake Gemini server.
+
+Usage:  python -m benchmarks.llm_load --requests 200 --concurrency 100 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+PORT = 8765
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies, elapsed):
+    print(
+        f"{name:>6}: p50={percentile(latencies, 50) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.1f}ms "
+        f"rps={len(latencies) / elapsed:8.1f}"
+    )
+
+
+async def run_load(call, total, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with gate:
+            start = time.perf_counter()
+            await call(f"Question {i}: tell me about yourself")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, time.perf_counter() - start
+
+
+async def main(args):
+    import anyio.to_thread
+    from backend import llm_client
+
+    async def sync_call(prompt):
+        # Same limiter FastAPI uses for sync handlers (40 threads by default)
+        return await anyio.to_thread.run_sync(llm_client.generate_response, prompt)
+
+    async def async_call(prompt):
+        return await llm_client.generate_response_async(prompt)
+
+    for name, call in (("sync", sync_call), ("async", async_call)):
+        latencies, elapsed = await run_load(call, args.requests, args.concurrency)
+        report(name, latencies, elapsed)
+    await llm_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    # Point both paths at the fake server before llm_client reads its config
+    os.environ["GEMINI_API_BASE"] = f"http://127.0.0.1:{PORT}"
+    os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+    os.environ.setdefault("GEMINI_MAX_CONCURRENT_PER_KEY", str(args.concurrency))
+    os.environ.setdefault("GEMINI_RPM_PER_KEY", "0")
+
+    from benchmarks.fake_gemini import serve_in_thread
+    serve_in_thread(PORT, latency=args.latency)
+    asyncio.run(main(args))
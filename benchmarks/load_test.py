@@ -0,0 +1,181 @@
+"""
+End-to-end load test: N concurrent candidates each run a full interview
+(/start_session -> 15x /chat -> /feedback) against the app in-process, with
+the LLM replaced by the fake provider. Reports throughput, per-endpoint tail
+latency and memory per session; --json writes the numbers for comparing
+runs in regression checks.
+
+Usage:  python -m benchmarks.load_test --candidates 50 --latency 0.5 [--stream] [--partials] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import defaultdict
+
+from benchmarks.llm_load import percentile
+
+ANSWERS = (
+    "I led the migration of our payments service to an event driven design and cut p99 latency in half.",
+    "Not sure.",
+    "We used Redis for caching with short TTLs and invalidated on writes from the order service.",
+    "I think the main trade-off was consistency versus latency, so we chose eventual consistency for reads "
+    "and kept the write path strongly consistent, which meant adding idempotency keys everywhere and "
+    "rethinking retries. By the way, that reminds me of another project where we did something similar.",
+    "I would add better monitoring first.",
+)
+
+
+def rss_bytes() -> int:
+    # Linux; resident pages times page size
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def run_candidate(client, rng, latencies, args, failures, rejections):
+    # Each candidate is its own client for admission control
+    headers = {"X-Client-Id": str(rng.random())}
+
+    async def call(endpoint, path, payload):
+        while True:
+            started = time.perf_counter()
+            # The whole body is read, so a streamed turn counts until its last byte
+            response = await client.post(path, json=payload, headers=headers)
+            latencies[endpoint].append(time.perf_counter() - started)
+            retry_after = None
+            if response.status_code in (429, 503):
+                retry_after = float(response.headers.get("Retry-After", 1))
+            elif endpoint == "chat_stream" and response.status_code == 200:
+                last = json.loads(response.text.splitlines()[-1])
+                if last["type"] == "error":
+                    retry_after = last["retry_after"]
+            if retry_after is None:
+                break
+            # Back off as told, like a well-behaved client
+            rejections[endpoint] += 1
+            await asyncio.sleep(retry_after)
+        if response.status_code != 200:
+            failures.append((endpoint, response.status_code))
+        return response
+
+    response = await call("start_session", "/start_session", {"role": "Backend Developer", "experience_level": "Senior"})
+    session_id = response.json()["session_id"]
+
+    over = False
+    while not over:
+        if args.think:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think))
+        answer = rng.choice(ANSWERS)
+        if args.partials:
+            words = answer.split()
+            await call("chat_partial", "/chat/partial",
+                       {"session_id": session_id, "partial_text": " ".join(words[: max(3, len(words) * 4 // 5)])})
+        if args.stream:
+            response = await call("chat_stream", "/chat_stream", {"session_id": session_id, "user_message": answer})
+            events = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+            over = events[-1]["is_interview_over"]
+        else:
+            response = await call("chat", "/chat", {"session_id": session_id, "user_message": answer})
+            over = response.json()["is_interview_over"]
+
+    await call("feedback", "/feedback", {"session_id": session_id, "user_message": ""})
+    return session_id
+
+
+async def main(args):
+    from httpx import ASGITransport, AsyncClient
+    from backend import llm_client, main as backend_main
+
+    rng = random.Random(args.seed)
+    latencies = defaultdict(list)
+    failures = []
+    rejections = defaultdict(int)
+
+    baseline_rss = rss_bytes()
+    transport = ASGITransport(app=backend_main.app)
+    async with AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        started = time.perf_counter()
+        session_ids = await asyncio.gather(*(
+            run_candidate(client, random.Random(rng.random()), latencies, args, failures, rejections)
+            for _ in range(args.candidates)
+        ))
+        elapsed = time.perf_counter() - started
+    # Sessions are still held by the store, so this is their resident footprint
+    rss_per_session = (rss_bytes() - baseline_rss) / args.candidates
+
+    for session_id in session_ids:
+        session = backend_main.session_store.get(session_id)
+        assert session["is_over"], session_id
+        assert session.get("feedback"), f"no feedback stored for {session_id}"
+
+    requests = sum(len(samples) for samples in latencies.values())
+    result = {
+        "candidates": args.candidates,
+        "llm_latency": args.latency,
+        "seconds": round(elapsed, 2),
+        "interviews_per_minute": round(args.candidates / elapsed * 60, 1),
+        "requests_per_second": round(requests / elapsed, 1),
+        "llm_calls": llm_client.provider.calls,
+        "injected_429s": llm_client.provider.rate_limited,
+        "failures": len(failures),
+        "rejections": dict(rejections),
+        "rss_kb_per_session": round(rss_per_session / 1024, 1),
+        "endpoints": {
+            endpoint: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1),
+                "max_ms": round(max(samples) * 1000, 1),
+            }
+            for endpoint, samples in latencies.items()
+        },
+    }
+
+    print(f"{args.candidates} interviews in {result['seconds']}s: {result['interviews_per_minute']} interviews/min, "
+          f"{result['requests_per_second']} req/s, {result['llm_calls']} LLM calls, "
+          f"{result['injected_429s']} injected 429s, {result['failures']} failed requests, "
+          f"{sum(rejections.values())} refused by admission control and retried")
+    print(f"memory: {result['rss_kb_per_session']} KB RSS per session")
+    for endpoint, stats in result["endpoints"].items():
+        print(f"{endpoint:>14}: n={stats['count']:<5} p50={stats['p50_ms']:8.1f}ms p95={stats['p95_ms']:8.1f}ms "
+              f"p99={stats['p99_ms']:8.1f}ms max={stats['max_ms']:8.1f}ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    await llm_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=50, help="concurrent interviews")
+    parser.add_argument("--latency", type=float, default=0.5, help="median fake LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--distribution", default="lognormal", choices=("fixed", "uniform", "normal", "lognormal"))
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of LLM calls answered with 429")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds a candidate takes per answer")
+    parser.add_argument("--stream", action="store_true", help="use /chat_stream instead of /chat")
+    parser.add_argument("--partials", action="store_true", help="send an interim transcript before each answer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    # Configure the backend before it is imported
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_JITTER"] = str(args.jitter)
+    os.environ["FAKE_LLM_DISTRIBUTION"] = args.distribution
+    os.environ["FAKE_LLM_429_RATE"] = str(args.rate_limit_rate)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ.setdefault("GEMINI_RPM_PER_KEY", "0")
+    os.environ.setdefault("GEMINI_MAX_CONCURRENT_PER_KEY", str(max(8, args.candidates)))
+    # A short cooldown so injected 429s cost a retry, not the rest of the run
+    os.environ.setdefault("GEMINI_KEY_COOLDOWN", "0.1")
+    os.environ.setdefault("SESSION_STORE", "memory")
+    os.environ.setdefault("WHISPER_PRELOAD", "0")
+    # Rate limits per candidate; turns come faster than a person answers
+    os.environ.setdefault("ADMISSION_CLIENT_HEADER", "X-Client-Id")
+    os.environ.setdefault("ADMISSION_SESSION_RATE", "0")
+    asyncio.run(main(args))
@@ -0,0 +1,114 @@
+"""
+Persona detection: the previous rules vs classify(), timed per turn. Both
+scan the message for each keyword group in turn; classify() matches against
+prebuilt keyword tuples and takes recent answer lengths from the transcript's
+rolling stats instead of re-splitting the message list. That both give the
+same persona is checked in tests/test_persona.py.
+
+Usage:  python -m benchmarks.persona [--sessions 300] [--turns 15]
+"""
+import argparse
+import random
+import time
+
+from backend.persona_logic import FAMILIES, classify, score_transcript
+from backend.transcript import SessionTranscript
+
+
+def legacy_detect_persona(user_message, conversation_history):
+    # Copy of the rules as they were before classify()
+    message_lower = user_message.lower().strip()
+    word_count = len(user_message.split())
+    edge_keywords = ["make me ceo", "give me job", "hire me now", "your weights", "your model",
+                     "banana", "asdfgh", "blah blah", "random gibberish"]
+    if any(keyword in message_lower for keyword in edge_keywords):
+        return "edge"
+    if word_count < 3 and not any(word in message_lower for word in ["yes", "no", "okay", "sure"]):
+        return "edge"
+    confused_keywords = ["i don't know", "not sure", "what do you mean", "don't understand",
+                         "confused", "unclear", "help", "what is", "explain"]
+    if any(keyword in message_lower for keyword in confused_keywords):
+        return "confused"
+    if word_count <= 5:
+        recent_user_messages = [msg["content"] for msg in conversation_history[-6:] if msg["role"] == "user"]
+        if len(recent_user_messages) >= 2:
+            avg_length = sum(len(m.split()) for m in recent_user_messages) / len(recent_user_messages)
+            if avg_length < 8:
+                return "confused"
+    if 5 < word_count <= 25:
+        return "efficient"
+    if word_count > 100:
+        return "chatty"
+    if word_count > 60:
+        offtopic_keywords = ["by the way", "also", "speaking of", "reminds me", "funny story"]
+        if any(keyword in message_lower for keyword in offtopic_keywords):
+            return "chatty"
+    return "normal"
+
+
+FILLER = ("i worked on the backend service and we scaled it to handle more traffic while keeping "
+          "latency low for our customers across regions using caching queues and careful monitoring").split()
+KEYWORDS = [k for keywords in FAMILIES.values() for k in keywords] + ["Not Sure", "NOTHING", "know", "helpful"]
+
+
+def random_message(rng):
+    words = rng.choice([1, 2, 3, 4, 5, 6, 12, 24, 26, 40, 61, 80, 101, 150])
+    message = [rng.choice(FILLER) for _ in range(words)]
+    for _ in range(rng.choice([0, 0, 1, 2])):
+        message.insert(rng.randrange(len(message) + 1), rng.choice(KEYWORDS))
+    return " ".join(message)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=15)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sessions = [[random_message(rng) for _ in range(args.turns)] for _ in range(args.sessions)]
+
+    histories = []
+    for answers in sessions:
+        history = []
+        for answer in answers:
+            history += [{"role": "model", "content": "Tell me about a project?"}, {"role": "user", "content": answer}]
+        histories.append(history)
+
+    # The legacy rules saw the session's live message list; grow one the same way
+    legacy_s = 0.0
+    for history in histories:
+        live = []
+        for i in range(0, len(history), 2):
+            live += history[i:i + 2]
+            start = time.perf_counter()
+            legacy_detect_persona(history[i + 1]["content"], live)
+            legacy_s += time.perf_counter() - start
+
+    # Rolling stats as the transcript keeps them (maintained on append, not timed here)
+    turns_with_stats = []
+    for history in histories:
+        transcript = SessionTranscript("Engineer", "Senior", args.turns)
+        for i in range(0, len(history), 2):
+            transcript.append("model", history[i]["content"])
+            transcript.append("user", history[i + 1]["content"])
+            turns_with_stats.append((history[i + 1]["content"], tuple(transcript.recent_word_counts)))
+
+    start = time.perf_counter()
+    for answer, recent in turns_with_stats:
+        classify(answer, recent)
+    classify_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for history in histories:
+        score_transcript(history)
+    batch_s = time.perf_counter() - start
+
+    turns = args.sessions * args.turns
+    print(f"legacy rules        {legacy_s / turns * 1e6:7.1f} us/turn")
+    print(f"classify            {classify_s / turns * 1e6:7.1f} us/turn")
+    print(f"score_transcript    {batch_s / turns * 1e6:7.1f} us/message")
+
+
+if __name__ == "__main__":
+    main()
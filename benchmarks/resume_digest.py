@@ -0,0 +1,84 @@
+"""
+Prompt size with the raw resume vs the ranked profile digest.
+
+Builds a realistic multi-role resume (or reads --resume, plain text), runs it
+through profile_from_text/resume_digest and reports the estimated tokens the
+resume adds to every turn's system instruction, and over a full interview.
+
+Usage:  python -m benchmarks.resume_digest [--resume resume.txt] [--turns 15]
+"""
+import argparse
+
+from backend.llm_client import estimate_tokens
+from backend.resume_profile import profile_from_text, resume_digest
+from backend.transcript import transcript_for_session
+
+ROLES = [
+    ("Staff Software Engineer", "Northwind Payments", "Mar 2022", "Present"),
+    ("Senior Software Engineer", "Acme Cloud", "Jan 2019", "Feb 2022"),
+    ("Software Engineer", "Globex", "Jun 2016", "Dec 2018"),
+    ("Junior Developer", "Initech", "2014", "2016"),
+]
+BULLETS = [
+    "Led migration of {n} services to Kubernetes, cutting p99 latency by {p}%",
+    "Designed an event pipeline in Go processing {n}M events per day on AWS Kinesis",
+    "Owned on-call rotation and incident reviews for a team of {n} engineers",
+    "Introduced contract testing across {n} teams, reducing integration bugs by {p}%",
+    "Worked closely with product managers to refine requirements and priorities",
+    "Participated in code reviews and contributed to internal documentation",
+    "Mentored {n} junior engineers through design reviews and pairing",
+    "Rewrote the billing reconciliation job in Python, saving {p} hours of manual work a month",
+]
+
+
+def sample_resume():
+    lines = ["Alex Morgan", "alex@example.com | +1 555 0100 | github.com/alexm",
+             "PROFESSIONAL SUMMARY",
+             "Backend engineer with ten years of experience building payment and data platforms.",
+             "TECHNICAL SKILLS",
+             "Languages: Python, Go, Java, SQL, TypeScript",
+             "Infrastructure: Kubernetes, AWS, Terraform, Docker, Kafka, PostgreSQL, Redis",
+             "Practices: CI/CD, observability, incident response, system design",
+             "EXPERIENCE"]
+    for i, (title, org, start, end) in enumerate(ROLES):
+        lines.append(f"{title} | {org}")
+        lines.append(f"{start} - {end}")
+        for j, bullet in enumerate(BULLETS):
+            lines.append("• " + bullet.format(n=3 + i + j, p=10 + 5 * j))
+    lines += ["PROJECTS",
+              "ledgerlite: double-entry ledger library in Go",
+              "• 2k GitHub stars, used in production by 3 fintechs",
+              "ratekeeper: distributed rate limiter on Redis",
+              "• Handles 50k requests/s per node",
+              "EDUCATION",
+              "B.Sc. Computer Science, University of Somewhere, 2014",
+              "CERTIFICATIONS",
+              "AWS Certified Solutions Architect"]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume")
+    parser.add_argument("--turns", type=int, default=15)
+    args = parser.parse_args()
+
+    text = open(args.resume).read() if args.resume else sample_resume()
+    profile = profile_from_text(text)
+    digest = resume_digest(profile)
+
+    base = {"role": "Backend Engineer", "experience_level": "Senior", "max_questions": args.turns}
+    raw_prompt = transcript_for_session({**base, "resume_text": text}).system_instruction(1)
+    digest_prompt = transcript_for_session({**base, "resume_text": text, "resume_profile": profile}).system_instruction(1)
+
+    raw_tokens, digest_tokens = estimate_tokens(raw_prompt), estimate_tokens(digest_prompt)
+    print(f"profile: {len(profile['skills'])} skills, {len(profile['roles'])} roles, {len(profile['projects'])} projects")
+    print(f"resume text ~{estimate_tokens(text)} tokens -> digest ~{estimate_tokens(digest)} tokens")
+    print(f"system instruction per turn: raw ~{raw_tokens} tokens, digest ~{digest_tokens} tokens "
+          f"({100 * (1 - digest_tokens / raw_tokens):.0f}% smaller)")
+    print(f"over {args.turns} turns: ~{(raw_tokens - digest_tokens) * args.turns} prompt tokens saved")
+    print("\n" + digest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Resume parsing: legacy (string +=, on the event loop) vs the process pool
+with the content-hash cache, on large generated PDFs and DOCX files.
+
+Reports parse time and the worst event-loop stall seen by a 10 ms heartbeat
+while the uploads are being parsed; the stall is what every other user of
+the server waits for.
+
+Usage:  python -m benchmarks.resume_parse --pages 10 40 --uploads 4
+"""
+import argparse
+import asyncio
+import io
+import time
+
+from docx import Document
+from pypdf import PdfReader
+
+from backend import resume_parser
+
+LINE = "Led migration of payment services to Kubernetes, cutting p99 latency by 35% across 12 regions"
+
+
+def make_pdf(pages, lines_per_page=45):
+    """
+    Minimal multi-page PDF with real text content streams (no extra deps).
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = " ".join(f"BT /F1 9 Tf 40 {800 - 16 * i} Td ({page + 1}.{i} {LINE}) Tj ET" for i in range(lines_per_page))
+        stream = text.encode("latin-1")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{text}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_docx(pages, lines_per_page=45):
+    doc = Document()
+    for page in range(pages):
+        doc.add_heading(f"Experience {page + 1}", level=2)
+        for i in range(lines_per_page):
+            doc.add_paragraph(f"{page + 1}.{i} {LINE}")
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def legacy_parse(file_content, filename):
+    text = ""
+    if filename.endswith(".pdf"):
+        for page in PdfReader(io.BytesIO(file_content)).pages:
+            text += page.extract_text() + "\n"
+    else:
+        for para in Document(io.BytesIO(file_content)).paragraphs:
+            text += para.text + "\n"
+    return text.strip()
+
+
+async def heartbeat(stop, stalls):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        stalls.append(time.perf_counter() - start - 0.01)
+
+
+async def run(label, parse, files):
+    stop = asyncio.Event()
+    stalls = []
+    beat = asyncio.create_task(heartbeat(stop, stalls))
+    start = time.perf_counter()
+    texts = await asyncio.gather(*(parse(content, name) for name, content in files))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    print(f"  {label:<22} {elapsed * 1000:8.0f} ms total, worst loop stall {max(stalls, default=0) * 1000:6.0f} ms")
+    return texts
+
+
+async def legacy_on_loop(content, name):
+    return legacy_parse(content, name)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="+", type=int, default=[10, 40])
+    parser.add_argument("--uploads", type=int, default=4, help="concurrent distinct uploads")
+    args = parser.parse_args()
+
+    for pages in args.pages:
+        for kind, make in (("pdf", make_pdf), ("docx", make_docx)):
+            # Distinct files so the first pooled run measures parsing, not the cache
+            files = [(f"resume{i}.{kind}", make(pages + i)) for i in range(args.uploads)]
+            size_kb = sum(len(content) for _, content in files) / len(files) / 1024
+            print(f"{kind.upper()} {pages} pages (~{size_kb:.0f} KB) x {args.uploads} uploads")
+            legacy = await run("legacy, on event loop", legacy_on_loop, files)
+            pooled = await run("process pool", resume_parser.parse_resume_async, files)
+            await run("process pool, cached", resume_parser.parse_resume_async, files)
+            # Layout extraction may space text differently; the characters must match
+            assert ["".join(t.split()) for t in legacy] == ["".join(r["resume_text"].split()) for r in pooled]
+    resume_parser.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
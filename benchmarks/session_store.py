@@ -0,0 +1,64 @@
+"""
+Session store throughput: create a session, append a 15-question interview
+and read the session back between turns, as /chat does.
+
+Usage:  python -m benchmarks.session_store --sessions 500
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+from backend.session_store import InMemorySessionStore, SQLiteSessionStore
+from backend.transcript import transcript_for_session
+
+ANSWER = "I designed the caching layer for our checkout service and cut p99 latency in half. " * 4
+QUESTION = "Thanks for sharing that. How did you decide what to cache and for how long?"
+
+
+def run_interviews(store, sessions, questions):
+    turns = 0
+    start = time.perf_counter()
+    for _ in range(sessions):
+        session_id = str(uuid.uuid4())
+        session = {
+            "role": "Backend Developer",
+            "experience_level": "Senior",
+            "resume_text": "",
+            "question_count": 0,
+            "max_questions": questions,
+            "is_over": False,
+            "prompt_tokens": [],
+        }
+        session["transcript"] = transcript_for_session(session)
+        store.create(session_id, session)
+        store.append_message(session_id, session, "model", QUESTION)
+        for _ in range(questions):
+            session = store.get(session_id)
+            store.append_message(session_id, session, "user", ANSWER)
+            session["question_count"] += 1
+            session["prompt_tokens"].append(1200)
+            store.update(session_id, session, ["question_count", "prompt_tokens"])
+            store.append_message(session_id, session, "model", QUESTION)
+            turns += 1
+        assert len(store.get(session_id)["transcript"]) == 2 * questions + 1
+    elapsed = time.perf_counter() - start
+    return turns / elapsed, sessions / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = (
+            ("memory", InMemorySessionStore()),
+            ("sqlite", SQLiteSessionStore(os.path.join(tmp, "sessions.db"))),
+        )
+        for name, store in stores:
+            turns_per_s, sessions_per_s = run_interviews(store, args.sessions, args.questions)
+            print(f"{name:>6}: {turns_per_s:10.0f} turns/s  {sessions_per_s:8.1f} interviews/s")
+            store.close()
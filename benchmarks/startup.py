@@ -0,0 +1,91 @@
+"""
+Cold-start cost of a worker: import time and RSS of `import backend.main` in
+a fresh interpreter, the slowest top-level imports (from -X importtime), and
+which heavy dependencies got loaded eagerly when they should wait for first
+use or the lifespan hook.
+
+Usage:  python -m benchmarks.startup [--runs 5] [--module backend.main] [--json startup.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Should only be imported on first use (or in the lifespan hook)
+HEAVY = ("whisper", "torch", "faster_whisper", "google.generativeai", "pypdf", "docx", "gtts", "piper")
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def probe(module: str, importtime: bool = False) -> tuple:
+    """
+    Imports module in a new interpreter. Returns (stats, importtime stderr).
+    """
+    flags = ["-X", "importtime"] if importtime else []
+    result = subprocess.run(
+        [sys.executable, *flags, "-c", PROBE.format(module=module, heavy=HEAVY)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_imports(importtime: str, top: int) -> list:
+    """
+    Self import time summed per top-level package (torch, fastapi, backend...).
+    """
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    packages = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    stats = [probe(args.module)[0] for _ in range(args.runs)]
+    # Separate run for the breakdown; -X importtime slows the import down itself
+    _, importtime = probe(args.module, importtime=True)
+    result = {
+        "module": args.module,
+        "import_ms_median": round(statistics.median(s["seconds"] for s in stats) * 1000, 1),
+        "import_ms_min": round(min(s["seconds"] for s in stats) * 1000, 1),
+        "maxrss_mb": round(statistics.median(s["maxrss_kb"] for s in stats) / 1024, 1),
+        "modules": stats[-1]["modules"],
+        "heavy_loaded": stats[-1]["heavy"],
+        "slowest": [{"package": name, "ms": round(us / 1000, 1)} for name, us in slowest_imports(importtime, args.top)],
+    }
+
+    print(f"import {args.module}: median {result['import_ms_median']}ms (min {result['import_ms_min']}ms), "
+          f"RSS {result['maxrss_mb']} MB, {result['modules']} modules")
+    print("heavy dependencies loaded at import: " + (", ".join(result["heavy_loaded"]) or "none"))
+    for entry in result["slowest"]:
+        print(f"{entry['ms']:9.1f}ms  {entry['package']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
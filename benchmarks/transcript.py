@@ -0,0 +1,58 @@
+"""
+Benchmark: per-turn prompt work with the old full re-join and re-format vs
+SessionTranscript, over long sessions.
+
+Usage:  python -m benchmarks.transcript --turns 200 --words 150
+"""
+import argparse
+import time
+
+from backend.prompts import SYSTEM_PROMPT_TEMPLATE, NEXT_QUESTION_PROMPT
+from backend.transcript import SessionTranscript
+
+RESUME = "Senior engineer with ten years of Python, Go and distributed systems experience. " * 40
+PERSONA_INSTRUCTION = "\nThe user is responding normally.\n- Continue with standard interview flow\n"
+
+
+def legacy_session(turns, answer):
+    history = []
+    for n in range(turns):
+        history.append({"role": "user", "content": answer})
+        conversation_history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history])
+        system_instruction = SYSTEM_PROMPT_TEMPLATE.format(
+            role="Backend Developer",
+            experience_level="Senior",
+            current_question_num=n + 2,
+            max_questions=turns + 1,
+        ) + f"\nCandidate Resume:\n{RESUME}\n" + f"\n\nDETECTED PERSONA: NORMAL\n{PERSONA_INSTRUCTION}"
+        prompt = NEXT_QUESTION_PROMPT.format(conversation_history=conversation_history_str)
+        history.append({"role": "model", "content": "Thanks. Next question?"})
+    return prompt, system_instruction
+
+
+def transcript_session(turns, answer):
+    transcript = SessionTranscript("Backend Developer", "Senior", turns + 1, RESUME)
+    for n in range(turns):
+        transcript.append("user", answer)
+        system_instruction = transcript.system_instruction(n + 2, "normal", PERSONA_INSTRUCTION)
+        prompt = NEXT_QUESTION_PROMPT.format(conversation_history=transcript.render())
+        transcript.append("model", "Thanks. Next question?")
+    return prompt, system_instruction
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--words", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    answer = " ".join(["word"] * args.words)
+
+    assert legacy_session(args.turns, answer) == transcript_session(args.turns, answer)
+
+    for name, run in (("legacy", legacy_session), ("transcript", transcript_session)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run(args.turns, answer)
+        per_session = (time.perf_counter() - start) / args.repeat
+        print(f"{name:>10}: {per_session * 1000:8.2f}ms per {args.turns}-turn session")
@@ -0,0 +1,61 @@
+"""
+Time-to-first-audio for a multi-sentence reply per TTS backend: whole reply
+in one call vs sentence by sentence, cold and from the phrase cache.
+
+Usage:  python -m benchmarks.tts_latency --backends espeak piper gtts
+"""
+import argparse
+import time
+
+from backend import tts
+from backend.prompts import END_OF_INTERVIEW_MESSAGE
+
+REPLY = (
+    "Thanks for walking me through that migration. "
+    "It sounds like you owned the rollout end to end. "
+    "Let's move on to system design. "
+    "How would you build a rate limiter shared by several API servers?"
+)
+
+
+def measure(backend_name):
+    tts._backend = tts.create_backend(backend_name)
+    tts.cache = tts.SpeechCache(64 * 1024 * 1024)
+
+    started = time.perf_counter()
+    tts.get_backend().synthesize(REPLY)
+    whole = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first = None
+    for _ in tts.synthesize_sentences(REPLY):
+        first = first or time.perf_counter() - started
+    total = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in tts.synthesize_sentences(END_OF_INTERVIEW_MESSAGE):
+        pass
+    cold_fixed = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in tts.synthesize_sentences(END_OF_INTERVIEW_MESSAGE):
+        pass
+    cached_fixed = time.perf_counter() - started
+
+    print(f"{tts._backend.name:<8} whole reply {whole * 1000:7.0f} ms | "
+          f"sentence-wise first audio {first * 1000:6.0f} ms, all {total * 1000:6.0f} ms | "
+          f"end message cold {cold_fixed * 1000:6.0f} ms, cached {cached_fixed * 1000:5.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["espeak", "gtts"])
+    args = parser.parse_args()
+    for name in args.backends:
+        try:
+            measure(name)
+        except Exception as e:
+            print(f"{name:<8} skipped: {e}")
+
+
+if __name__ == "__main__":
+    main()
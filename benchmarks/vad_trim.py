@@ -0,0 +1,68 @@
+"""
+Server-side VAD/trim on padded recordings: how much audio is removed, what
+preprocessing costs, and how much Whisper time it saves.
+
+Each clip is speech-like audio with --lead/--tail seconds of room noise
+around it and one long pause in the middle, like a browser recording that
+waited for silence before stopping. Pass --clips for real recordings
+(padding is still added) and --no-asr to skip loading Whisper.
+
+Usage:  python -m benchmarks.vad_trim --model tiny
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.whisper_rtf import SAMPLE_RATE, load_clips, synthetic_clips
+
+
+def pad(clip, lead, tail, pause, rng):
+    def noise(seconds):
+        return (0.003 * rng.standard_normal(int(SAMPLE_RATE * seconds))).astype(np.float32)
+    half = len(clip) // 2
+    return np.concatenate([noise(lead), clip[:half], noise(pause), clip[half:], noise(tail)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clips", help="directory of audio clips")
+    parser.add_argument("--count", type=int, default=6)
+    parser.add_argument("--lead", type=float, default=1.5)
+    parser.add_argument("--tail", type=float, default=2.0)
+    parser.add_argument("--pause", type=float, default=3.0)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--no-asr", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.setdefault("WHISPER_PRELOAD", "0")
+    from backend import audio_utils
+
+    rng = np.random.default_rng(1)
+    speech = load_clips(args.clips) if args.clips else synthetic_clips(args.count, (4, 8, 12))
+    clips = [pad(clip, args.lead, args.tail, args.pause, rng) for clip in speech]
+
+    start = time.perf_counter()
+    trimmed = [audio_utils.preprocess_audio(clip) for clip in clips]
+    vad_s = time.perf_counter() - start
+
+    raw_seconds = sum(len(c) for c in clips) / SAMPLE_RATE
+    trimmed_seconds = sum(len(c) for c in trimmed) / SAMPLE_RATE
+    print(f"audio: {raw_seconds:.1f}s padded -> {trimmed_seconds:.1f}s after trim "
+          f"({100 * (1 - trimmed_seconds / raw_seconds):.0f}% removed), "
+          f"preprocessing {1000 * vad_s / len(clips):.1f} ms/clip")
+
+    if args.no_asr:
+        return
+    audio_utils.load_whisper("openai", args.model)
+    for label, batch in (("padded", clips), ("trimmed", trimmed)):
+        start = time.perf_counter()
+        for clip in batch:
+            audio_utils.transcribe_audio(clip)
+        elapsed = time.perf_counter() - start
+        print(f"ASR {label:<8} {1000 * elapsed / len(batch):8.0f} ms/clip")
+
+
+if __name__ == "__main__":
+    main()
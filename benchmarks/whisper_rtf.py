@@ -0,0 +1,87 @@
+"""
+Whisper real-time factor (processing time / audio duration) per model
+configuration, sequential vs micro-batched.
+
+Clips come from --clips (any format ffmpeg reads). Without it, synthetic
+speech-like clips are generated so the benchmark runs anywhere; use real
+recordings for meaningful accuracy, the timing is representative either way.
+
+Usage:  python -m benchmarks.whisper_rtf --configs openai:tiny openai:base faster-whisper:base:int8
+"""
+import argparse
+import asyncio
+import glob
+import os
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_clips(count, seconds):
+    rng = np.random.default_rng(0)
+    clips = []
+    for i in range(count):
+        t = np.arange(int(SAMPLE_RATE * seconds[i % len(seconds)])) / SAMPLE_RATE
+        # Voiced-sounding carrier with a ~4 Hz syllable envelope plus noise
+        carrier = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((140, 280, 420, 900, 2400), 1))
+        envelope = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0, None)
+        clips.append((0.1 * carrier * envelope + 0.005 * rng.standard_normal(len(t))).astype(np.float32))
+    return clips
+
+
+def load_clips(directory):
+    from backend.audio_utils import decode_audio
+    clips = []
+    for path in sorted(glob.glob(os.path.join(directory, "*"))):
+        with open(path, "rb") as f:
+            clips.append(decode_audio(f.read()))
+    return clips
+
+
+async def batched_run(audio_utils, clips):
+    return await asyncio.gather(*(audio_utils.transcribe_async(clip) for clip in clips))
+
+
+def run_config(config, clips):
+    from backend import audio_utils
+
+    parts = config.split(":")
+    backend, size = parts[0], parts[1]
+    compute_type = parts[2] if len(parts) > 2 else None
+
+    # Fresh singleton per configuration
+    audio_utils.model = None
+    start = time.perf_counter()
+    audio_utils.load_whisper(backend, size, compute_type)
+    load_s = time.perf_counter() - start
+
+    audio_seconds = sum(len(clip) for clip in clips) / SAMPLE_RATE
+    start = time.perf_counter()
+    for clip in clips:
+        audio_utils.transcribe_audio(clip)
+    sequential_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    asyncio.run(batched_run(audio_utils, clips))
+    batched_s = time.perf_counter() - start
+
+    print(
+        f"{config:<28} load={load_s:6.1f}s  "
+        f"RTF sequential={sequential_s / audio_seconds:6.3f}  "
+        f"RTF batched={batched_s / audio_seconds:6.3f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--configs", nargs="+", default=["openai:tiny", "openai:base"])
+    parser.add_argument("--clips", help="directory of audio clips")
+    parser.add_argument("--count", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault("WHISPER_PRELOAD", "0")
+    clips = load_clips(args.clips) if args.clips else synthetic_clips(args.count, (4, 8, 12))
+    for config in args.configs:
+        run_config(config, clips)
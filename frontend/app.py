@@ -68,6 +68,12 @@ if st.session_state.interview_active:
                     if data["is_interview_over"]:
                         st.session_state.interview_active = False
                         st.rerun()
+                elif response.status_code in (429, 503):
+                    # Resending the same answer is safe: it is answered, not recorded twice
+                    st.warning(f"The interviewer is busy, please send your answer again in "
+                               f"{response.headers.get('Retry-After', '1')}s.")
+                else:
+                    st.error(f"Error: {response.json().get('detail', response.status_code)}")
         except Exception as e:
             st.error(f"Error: {e}")
 
@@ -77,7 +83,7 @@ if st.session_state.interview_active:
     # Read the HTML component
     import os
     with open("frontend/vad_component.html", "r") as f:
-        vad_html = f.read()
+        vad_html = f.read().replace("__SESSION_ID__", st.session_state.session_id)
         
     # Inject into Streamlit
     st.components.v1.html(vad_html, height=300)
@@ -3,12 +3,21 @@ let recognition = null;
 let synth = window.speechSynthesis;
 let isListening = false;
 let resumeText = "";
+let resumeProfile = null;
 let interviewStartTime = null;
 let timerInterval = null;
 let shouldKeepListening = false;
 let accumulatedTranscript = '';
+let lastAnswerText = null;
+let lastTurnId = null;
 
 const API_URL = "http://localhost:8000";
+// A busy server (429/503) is retried after Retry-After, this many times
+const MAX_ANSWER_RETRIES = 5;
+// Interim transcripts let the backend draft the next question early
+const PARTIAL_INTERVAL_MS = 1500;
+let lastPartialSentAt = 0;
+let lastPartialText = '';
 
 // Timer functions
 function startTimer() {
@@ -45,6 +54,7 @@ async function startInterview() {
             const res = await fetch(`${API_URL}/upload_resume`, { method: "POST", body: formData });
             const data = await res.json();
             resumeText = data.resume_text;
+            resumeProfile = data.resume_profile;
         } catch (err) {
             console.error("Resume upload failed", err);
         }
@@ -55,7 +65,7 @@ async function startInterview() {
         const response = await fetch(`${API_URL}/start_session`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ role, experience_level: experience, resume_text: resumeText })
+            body: JSON.stringify({ role, experience_level: experience, resume_text: resumeText, resume_profile: resumeProfile })
         });
         const data = await response.json();
         sessionId = data.session_id;
@@ -187,6 +197,7 @@ function startListening() {
         const displayText = accumulatedTranscript + finalTranscript + interimTranscript;
         const truncated = displayText.length > 100 ? displayText.substring(0, 100) + '...' : displayText;
         updateStatus(`Listening: ${truncated}`);
+        sendPartialAnswer(displayText.trim());
 
         silenceTimer = setTimeout(() => {
             console.log("15 seconds of silence detected, stopping...");
@@ -263,26 +274,134 @@ function submitTextAnswer() {
     sendUserResponse(answer);
 }
 
-async function sendUserResponse(text) {
-    addMessage("user", text);
+// Throttled, fire-and-forget; a failed or skipped partial only loses the head start
+function sendPartialAnswer(text) {
+    const now = Date.now();
+    if (!sessionId || !text || text === lastPartialText || now - lastPartialSentAt < PARTIAL_INTERVAL_MS) return;
+    lastPartialSentAt = now;
+    lastPartialText = text;
+    fetch(`${API_URL}/chat/partial`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ session_id: sessionId, partial_text: text })
+    }).catch(() => {});
+}
+
+// Queue one sentence for speech; listening resumes after the last one
+function speakSentence(text, isLast) {
+    const utterance = new SpeechSynthesisUtterance(text);
+    utterance.rate = 1.0;
+    utterance.pitch = 1.0;
+
+    utterance.onstart = () => {
+        updateStatus("Agent Speaking...");
+    };
+
+    if (isLast) {
+        utterance.onend = () => {
+            startListening();
+        };
+    }
+
+    synth.speak(utterance);
+}
+
+// The answer was refused for load: resend it (same turn id) after retryAfter
+// seconds, or give up and let the candidate answer again
+function retryAnswerLater(text, retryAfter, attempt) {
+    if (attempt >= MAX_ANSWER_RETRIES) {
+        updateStatus("The interviewer is busy. Please answer again in a moment.");
+        startListening();
+        return;
+    }
+    const seconds = Math.max(1, retryAfter || 1);
+    updateStatus(`The interviewer is busy, retrying in ${seconds}s...`);
+    setTimeout(() => sendUserResponse(text, attempt + 1), seconds * 1000);
+}
+
+async function sendUserResponse(text, attempt = 0) {
+    // The same answer resent before its reply arrived (double submit, recognition
+    // restart) reuses the turn id, so the backend replays instead of counting a new turn
+    if (text !== lastAnswerText) {
+        lastAnswerText = text;
+        lastTurnId = crypto.randomUUID();
+    }
+    const turnId = lastTurnId;
+
+    if (attempt === 0) addMessage("user", text);
     updateStatus("Thinking...");
 
+    if (synth.speaking) synth.cancel();
+
     try {
-        const response = await fetch(`${API_URL}/chat`, {
+        const response = await fetch(`${API_URL}/chat_stream`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ session_id: sessionId, user_message: text })
+            body: JSON.stringify({ session_id: sessionId, user_message: text, turn_id: turnId })
         });
 
-        const data = await response.json();
+        if (response.status === 429 || response.status === 503) {
+            retryAnswerLater(text, parseInt(response.headers.get("Retry-After"), 10), attempt);
+            return;
+        }
+        if (!response.ok) {
+            const body = await response.json().catch(() => ({}));
+            updateStatus("Error: " + (body.detail || response.statusText));
+            // Without a session there is nothing left to answer
+            if (response.status !== 404) startListening();
+            return;
+        }
+
+        // Speak each sentence as soon as it arrives, holding back one so the
+        // final sentence can be flagged to restart listening
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        let spokenText = '';
+        let pendingSentence = null;
+        let done = null;
+        let error = null;
+
+        while (true) {
+            const { value, done: streamDone } = await reader.read();
+            if (streamDone) break;
+            buffered += decoder.decode(value, { stream: true });
+
+            let newline;
+            while ((newline = buffered.indexOf('\n')) >= 0) {
+                const line = buffered.slice(0, newline).trim();
+                buffered = buffered.slice(newline + 1);
+                if (!line) continue;
+
+                const event = JSON.parse(line);
+                if (event.type === 'sentence') {
+                    if (pendingSentence !== null) speakSentence(pendingSentence, false);
+                    pendingSentence = event.text;
+                    spokenText += (spokenText ? ' ' : '') + event.text;
+                } else if (event.type === 'done') {
+                    done = event;
+                } else if (event.type === 'error') {
+                    error = event;
+                }
+            }
+        }
+
+        if (error) {
+            retryAnswerLater(text, error.retry_after, attempt);
+            return;
+        }
+
+        if (done) lastAnswerText = null;
+
+        const agentMessage = done ? done.agent_message : spokenText;
+        addMessage("agent", agentMessage);
+
+        if (pendingSentence !== null) {
+            speakSentence(pendingSentence, !(done && done.is_interview_over));
+        }
 
-        if (data.is_interview_over) {
-            addMessage("agent", data.agent_message);
-            speak(data.agent_message);
+        if (done && done.is_interview_over) {
             setTimeout(endInterview, 5000);
-        } else {
-            addMessage("agent", data.agent_message);
-            speak(data.agent_message);
         }
     } catch (err) {
         console.error(err);
@@ -303,19 +422,43 @@ async function endInterview() {
     document.getElementById("interview-screen").classList.add("hidden");
     document.getElementById("feedback-screen").classList.remove("hidden");
 
+    // Feedback usually started generating when the interview ended; show its progress
+    const feedbackContent = document.getElementById("feedback-content");
+    const progressPoll = setInterval(async () => {
+        try {
+            const res = await fetch(`${API_URL}/feedback/${encodeURIComponent(sessionId)}/status`);
+            const status = await res.json();
+            if (status.status === "running") {
+                feedbackContent.textContent = `Generating feedback... ${Math.round(status.elapsed_ms / 1000)}s`;
+            }
+        } catch (err) {
+            // Progress is cosmetic; the feedback request below is what matters
+        }
+    }, 1000);
+
     try {
-        const response = await fetch(`${API_URL}/feedback`, {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ session_id: sessionId, user_message: "" })
-        });
+        let response;
+        // Feedback generation waits for an LLM slot like any turn; a busy server is retried
+        for (let attempt = 0; ; attempt++) {
+            response = await fetch(`${API_URL}/feedback`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ session_id: sessionId, user_message: "" })
+            });
+            if ((response.status !== 429 && response.status !== 503) || attempt >= MAX_ANSWER_RETRIES) break;
+            const seconds = Math.max(1, parseInt(response.headers.get("Retry-After"), 10) || 1);
+            await new Promise(resolve => setTimeout(resolve, seconds * 1000));
+        }
+        if (!response.ok) throw new Error(`Feedback request failed: ${response.status}`);
         const data = await response.json();
+        clearInterval(progressPoll);
 
         const feedbackText = data.feedback.spoken_feedback || "No feedback available.";
 
         document.getElementById("feedback-content").innerHTML = feedbackText.replace(/\n/g, '<br>');
 
     } catch (err) {
+        clearInterval(progressPoll);
         document.getElementById("feedback-content").textContent = "Error loading feedback.";
     }
 }
@@ -0,0 +1,102 @@
+"""
+Concurrency stress test for /chat: many answers (and duplicate retries with
+the same turn_id) for one session fired at once. The transcript must stay
+strictly alternating, each reply must follow its own answer, and retries
+must never cost a second LLM call or count as another answer.
+"""
+import asyncio
+import random
+import uuid
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from backend import context_builder
+from backend import main as backend_main
+
+SESSIONS = 10
+# Below max_questions (15), so every retry lands on a running interview
+ANSWERS = 14
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """
+    Replaces the LLM with a fake that answers the last user message after a
+    random delay; returns the list of prompts it was called with.
+    """
+    calls = []
+
+    async def fake_generate(prompt, system_instruction=None, cache_key=None):
+        calls.append(prompt)
+        await asyncio.sleep(random.uniform(0, 0.02))
+        last_answer = prompt.rsplit("\nuser: ", 1)[-1].split("\n", 1)[0]
+        return f"reply to {last_answer}"
+
+    monkeypatch.setattr(backend_main, "generate_response_async", fake_generate)
+    # Every start_session must reach the fake, and the burst of retries must not be throttled
+    monkeypatch.setattr(backend_main, "response_cache", None)
+    monkeypatch.setattr(backend_main.admission, "enabled", False)
+    # Keep background summaries out of the LLM call count
+    monkeypatch.setattr(context_builder, "RECENT_MESSAGES", 1000)
+    return calls
+
+
+async def run_session(client, answers):
+    response = await client.post("/start_session", json={"role": "Backend Developer"})
+    session_id = response.json()["session_id"]
+
+    turns = [(f"answer {i}", str(uuid.uuid4())) for i in range(answers)]
+    # Every turn is sent twice, as a double-click or recognition retry would
+    requests = turns + random.sample(turns, len(turns))
+    random.shuffle(requests)
+    replies = await asyncio.gather(*(
+        client.post("/chat", json={"session_id": session_id, "user_message": text, "turn_id": turn_id})
+        for text, turn_id in requests
+    ))
+    for (text, _), reply in zip(requests, replies):
+        assert reply.status_code == 200, reply.text
+        assert reply.json() == {"agent_message": f"reply to {text}", "is_interview_over": False}, text
+    return session_id
+
+
+async def run_sessions(sessions, answers):
+    transport = httpx.ASGITransport(app=backend_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(run_session(client, answers) for _ in range(sessions)))
+
+
+def test_concurrent_answers_and_retries(llm_calls):
+    session_ids = asyncio.run(run_sessions(SESSIONS, ANSWERS))
+
+    for session_id in session_ids:
+        session = backend_main.session_store.get(session_id)
+        messages = session["transcript"].messages
+        roles = [message["role"] for message in messages]
+        assert roles == ["model", "user"] * ANSWERS + ["model"]
+        for answer, reply in zip(messages[1::2], messages[2::2]):
+            assert reply["content"] == f"reply to {answer['content']}"
+        assert session["question_count"] == ANSWERS
+        assert not session["is_over"]
+
+    # One opening question plus one reply per answer; retries are replayed
+    assert len(llm_calls) == SESSIONS * (ANSWERS + 1)
+
+
+def test_retry_of_the_first_turn_after_the_last(llm_calls):
+    async def interview():
+        transport = httpx.ASGITransport(app=backend_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/start_session", json={"role": "Backend Developer"})
+            session_id = response.json()["session_id"]
+            turn_ids = [str(uuid.uuid4()) for _ in range(ANSWERS)]
+            for i, turn_id in enumerate(turn_ids):
+                await client.post("/chat", json={"session_id": session_id, "user_message": f"answer {i}", "turn_id": turn_id})
+            retry = await client.post("/chat", json={"session_id": session_id, "user_message": "answer 0", "turn_id": turn_ids[0]})
+            return session_id, retry.json()
+
+    session_id, reply = asyncio.run(interview())
+    assert reply == {"agent_message": "reply to answer 0", "is_interview_over": False}
+    assert backend_main.session_store.get(session_id)["question_count"] == ANSWERS
@@ -0,0 +1,112 @@
+"""
+Context caching end to end against the fake Gemini app from benchmarks.fake_gemini.
+"""
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from backend import llm_client
+from backend.context_cache import ContextCache
+from backend.key_scheduler import KeyScheduler
+from benchmarks.fake_gemini import FAKE_REPLY, MIN_CACHE_TOKENS, create_app
+
+# Above the model's minimum for cached content (~4.5k tokens)
+INSTRUCTION = "You are a professional interviewer for a Backend Developer. " * 300
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """
+    Points llm_client at an in-process fake Gemini app; returns a function
+    that builds and installs one (optionally with a higher cache minimum).
+    """
+    monkeypatch.setattr(llm_client, "CONTEXT_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_client, "CONTEXT_CACHE_MIN_TOKENS", MIN_CACHE_TOKENS)
+    monkeypatch.setattr(llm_client, "key_scheduler", KeyScheduler(["fake-key"], rpm_limit=0))
+    monkeypatch.setattr(llm_client, "context_cache", ContextCache(llm_client.MODEL_NAME))
+
+    def install(min_cache_tokens=MIN_CACHE_TOKENS):
+        app = create_app(latency=0.0, jitter=0.0, min_cache_tokens=min_cache_tokens)
+        provider = llm_client.GeminiProvider()
+        provider._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake-gemini")
+        monkeypatch.setattr(llm_client, "provider", provider)
+        return app
+
+    return install
+
+
+def run(coro):
+    async def with_cleanup():
+        try:
+            return await coro
+        finally:
+            await llm_client.aclose()
+    return asyncio.run(with_cleanup())
+
+
+def test_handle_is_created_once_and_reused(stub):
+    app = stub()
+
+    async def turns():
+        for turn in range(3):
+            await llm_client.generate_response_async(f"turn {turn}", INSTRUCTION, cache_key="session-a")
+    run(turns())
+
+    assert app.state.cache_creates == 1
+    assert all(body.get("cachedContent") and "systemInstruction" not in body for body in app.state.bodies)
+
+
+def test_server_side_expiry_falls_back_inline(stub):
+    app = stub()
+
+    async def turns():
+        await llm_client.generate_response_async("turn", INSTRUCTION, cache_key="session-a")
+        app.state.cached_contents.clear()
+        return await llm_client.generate_response_async("after expiry", INSTRUCTION, cache_key="session-a")
+    assert run(turns()) == FAKE_REPLY
+    assert "systemInstruction" in app.state.bodies[-1]
+    assert llm_client.context_cache.stats()["unavailable"] == 1
+
+
+def test_expire_deletes_the_handle(stub):
+    app = stub()
+
+    async def session():
+        await llm_client.generate_response_async("new session", INSTRUCTION, cache_key="session-b")
+        assert len(app.state.cached_contents) == 1
+        await llm_client.expire_cached_context("session-b")
+    run(session())
+    assert not app.state.cached_contents
+
+
+def test_small_prompt_is_sent_inline_without_a_create(stub):
+    app = stub()
+    assert not llm_client.context_cacheable("Short prompt.")
+    run(llm_client.generate_response_async("tiny", "Short prompt.", cache_key="tiny"))
+    assert app.state.cache_creates == 0
+    assert "systemInstruction" in app.state.bodies[-1]
+    assert llm_client.context_cache.stats()["unavailable"] == 0
+
+
+def test_refused_create_is_not_retried_on_every_call(stub):
+    app = stub(min_cache_tokens=100_000)
+
+    async def turns():
+        for turn in range(3):
+            await llm_client.generate_response_async(f"small {turn}", INSTRUCTION, cache_key="small")
+    run(turns())
+
+    assert len(app.state.bodies) == 3
+    assert all("systemInstruction" in body for body in app.state.bodies)
+    assert llm_client.context_cache.stats()["unavailable"] == 1
+
+
+def test_shipped_prompt_keeps_the_per_turn_system_prompt(stub):
+    from backend.transcript import SessionTranscript
+
+    # Below the cache minimum, so there is no point rewriting the prompts
+    transcript = SessionTranscript("Backend Developer", "Junior", 15)
+    assert not llm_client.context_cacheable(transcript.cached_instruction)
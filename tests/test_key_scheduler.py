@@ -0,0 +1,55 @@
+"""
+KeyScheduler against the rate-limiting stub from benchmarks.key_scheduler_sim.
+"""
+from argparse import Namespace
+
+from backend.key_scheduler import KeyScheduler, WINDOW_SECONDS
+from benchmarks.key_scheduler_sim import Clock, simulate_rotation, simulate_scheduler
+
+
+def test_scheduler_never_exceeds_a_key_budget():
+    args = Namespace(keys=3, rpm=15, rate=40, requests=600)
+    served, wasted, dropped, stats = simulate_scheduler(args)
+    assert wasted == 0
+    assert served + dropped == args.requests
+    assert all(row["rate_limited"] == 0 for row in stats)
+
+
+def test_scheduler_serves_at_least_as_much_as_rotation():
+    args = Namespace(keys=3, rpm=15, rate=60, requests=600)
+    rotation_served, rotation_wasted, _ = simulate_rotation(args)
+    served, wasted, _, _ = simulate_scheduler(args)
+    assert rotation_wasted > 0
+    assert served >= rotation_served
+
+
+def test_in_flight_requests_count_once():
+    rpm = 15
+    clock = Clock()
+    scheduler = KeyScheduler(["k0"], rpm_limit=rpm, clock=clock)
+    held = []
+    for _ in range(rpm):
+        assert scheduler.next_available_in() == 0
+        key = scheduler.acquire()
+        assert key is not None, f"only {len(held)} concurrent acquires fit a {rpm} RPM key"
+        held.append(key)
+    assert scheduler.acquire() is None
+    assert scheduler.next_available_in() == WINDOW_SECONDS
+
+    # Finishing them frees no budget until the window moves on
+    for key in held:
+        scheduler.release(key)
+    assert scheduler.acquire() is None
+    clock.now = WINDOW_SECONDS + 1
+    assert scheduler.acquire() is not None
+
+
+def test_rate_limited_key_is_skipped():
+    clock = Clock()
+    scheduler = KeyScheduler(["k0", "k1"], rpm_limit=15, clock=clock)
+    first = scheduler.acquire()
+    scheduler.release(first, rate_limited=True)
+    for _ in range(5):
+        key = scheduler.acquire()
+        assert key is not None and key.index != first.index
+        scheduler.release(key)
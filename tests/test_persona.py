@@ -0,0 +1,47 @@
+"""
+Persona detection matches the previous per-keyword rules (kept in
+benchmarks.persona) for every entry point.
+"""
+import random
+
+import pytest
+
+from backend.persona_logic import classify, detect_persona, score_transcript
+from backend.transcript import SessionTranscript
+from benchmarks.persona import legacy_detect_persona, random_message
+
+TURNS = 15
+
+
+def sessions(count):
+    rng = random.Random(0)
+    return [[random_message(rng) for _ in range(TURNS)] for _ in range(count)]
+
+
+@pytest.mark.parametrize("answers", sessions(100))
+def test_same_persona_as_legacy_rules(answers):
+    # As called from /chat: the user message is already in the history
+    history = []
+    transcript = SessionTranscript("Engineer", "Senior", TURNS)
+    for answer in answers:
+        for role, content in (("model", "Tell me about a project you are proud of?"), ("user", answer)):
+            history.append({"role": role, "content": content})
+            transcript.append(role, content)
+        expected = legacy_detect_persona(answer, history)
+        assert classify(answer, transcript.recent_word_counts) == expected, answer
+        assert detect_persona(answer, history) == expected, answer
+
+    assert score_transcript(history) == [legacy_detect_persona(m["content"], history[:i + 1])
+                                         for i, m in enumerate(history) if m["role"] == "user"]
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("banana", "edge"),
+    ("yes", "normal"),
+    ("Not sure what you mean by that", "confused"),
+    ("I built the ingestion pipeline and cut its latency in half", "efficient"),
+    (" ".join(["word"] * 101), "chatty"),
+    ("by the way " + " ".join(["word"] * 60), "chatty"),
+])
+def test_single_messages(message, expected):
+    assert classify(message, [("user", len(message.split()))]) == expected